@@ -0,0 +1,251 @@
+import argparse
+import csv
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import cv2
+from detection import add_detector_args, find_hands, hand_detector, wrap_detector
+from gestures import RULE_SETS, GestureTable
+from landmarks import NUM_LANDMARKS, LandmarkBuffer, finger_states
+
+# ===== Configuration =====
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+CHUNK_FRAMES = 300     # Frames per task handed to a worker
+SEEK_MARGIN = 30       # Frames to seek short of a chunk start, then read forward
+PARQUET_ROW_GROUP = 50_000   # Rows buffered before a Parquet row group is written
+# =========================
+
+# Per-process state, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(static, args):
+    detector = hand_detector(static, maxHands=args.max_hands, detectionCon=args.detection_con)
+    _worker['detector'] = wrap_detector(detector, args)
+    _worker['landmarks'] = LandmarkBuffer(args.max_hands)
+    _worker['gestures'] = GestureTable(RULE_SETS[args.rules])
+    _worker['flip'] = args.flip
+
+
+def _analyze(index, timestamp, img):
+    if _worker['flip']:
+        img = cv2.flip(img, 1)
+    hands = find_hands(_worker['detector'], img, draw=False)
+    landmarks = _worker['landmarks']
+    lms, is_right = landmarks.load(hands)
+    states = finger_states(lms, is_right)
+    labels = _worker['gestures'].classify_batch(states)
+
+    rows = []
+    for i, (hand, lm, fingers, gesture) in enumerate(zip(landmarks.hands, lms, states, labels)):
+        rows.append({
+            'frame': index,
+            'time': round(timestamp, 4),
+            'hand': i,
+            'type': hand['type'],
+            'gesture': gesture,
+            'fingers': ''.join('1' if up else '0' for up in fingers),
+            'bbox': [int(v) for v in hand['bbox']],
+            'landmarks': lm.ravel().tolist(),
+        })
+    return rows
+
+
+def _seek(cap, index):
+    # CAP_PROP_POS_FRAMES seeks aren't frame-accurate for inter-coded video: land a little
+    # early, check where the capture says it is, and grab forward to the exact frame
+    if index == 0:
+        return True
+    cap.set(cv2.CAP_PROP_POS_FRAMES, max(0, index - SEEK_MARGIN))
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if not 0 <= position <= index:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)   # Overshot: read from the start instead
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if position != 0:
+            return False
+    for _ in range(index - position):
+        if not cap.grab():
+            return False
+    return True
+
+
+def _process_video_chunk(task):
+    path, start, stop, fps = task   # stop=None reads to the end of the video
+    cap = cv2.VideoCapture(path)
+    rows = []
+    count = 0
+    if not _seek(cap, start):
+        print(f"Could not seek to frame {start} of {path}")
+        cap.release()
+        return count, rows
+    index = start
+    while stop is None or index < stop:
+        success, img = cap.read()
+        if not success:
+            break
+        rows.extend(_analyze(index, index / fps, img))
+        count += 1
+        index += 1
+    cap.release()
+    return count, rows
+
+
+def _process_image_chunk(task):
+    rows = []
+    for index, path in task:
+        img = cv2.imread(path)
+        if img is None:
+            print(f"Skipping unreadable image: {path}")
+            continue
+        rows.extend(_analyze(index, 0.0, img))
+    return len(task), rows
+
+
+def _video_tasks(path, chunk):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    if total <= 0:
+        # Some containers don't report a frame count: one sequential task
+        print(f"No frame count for {path}; reading it sequentially")
+        return [(path, 0, None, fps)]
+    # The count can also be short, so the last chunk reads to the end
+    starts = range(0, total, chunk)
+    return [(path, start, start + chunk if start + chunk < total else None, fps)
+            for start in starts]
+
+
+def _image_tasks(folder, chunk):
+    files = sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+    paths = list(enumerate(os.path.join(folder, f) for f in files))
+    return [paths[i:i + chunk] for i in range(0, len(paths), chunk)]
+
+
+# ===== Output writers =====
+def _flat_row(row):
+    flat = {key: row[key] for key in ('frame', 'time', 'hand', 'type', 'gesture', 'fingers')}
+    flat.update(zip(('bbox_x', 'bbox_y', 'bbox_w', 'bbox_h'), row['bbox']))
+    for i in range(NUM_LANDMARKS):
+        flat[f'x{i}'], flat[f'y{i}'], flat[f'z{i}'] = row['landmarks'][3*i:3*i + 3]
+    return flat
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = None
+
+    def write(self, rows):
+        for row in rows:
+            flat = _flat_row(row)
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.file, fieldnames=list(flat))
+                self.writer.writeheader()
+            self.writer.writerow(flat)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    # Rows are buffered and written as a row group every ``row_group`` rows
+    def __init__(self, path, row_group=PARQUET_ROW_GROUP):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.path = path
+        self.row_group = row_group
+        self.rows = []
+        self.writer = None
+
+    def write(self, rows):
+        self.rows.extend(_flat_row(row) for row in rows)
+        if len(self.rows) >= self.row_group:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not self.rows and self.writer is not None:
+            return
+        schema = self.writer.schema if self.writer is not None else None
+        table = pa.Table.from_pylist(self.rows, schema=schema)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter, 'parquet': ParquetWriter}
+# ==========================
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run hand detection and gesture classification over a video or image folder "
+                    "without a display. Writes one row per detected hand.")
+    parser.add_argument("input", help="video file or folder of images")
+    parser.add_argument("-o", "--output", required=True, help="output file")
+    parser.add_argument("--format", choices=sorted(WRITERS),
+                        help="output format (default: from the output extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk", type=int, default=CHUNK_FRAMES, help="frames per task")
+    parser.add_argument("--rules", choices=sorted(RULE_SETS), default='default',
+                        help="gesture rule set")
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--detection-con", type=float, default=0.8)
+    parser.add_argument("--flip", action="store_true", help="mirror frames like the live apps do")
+    add_detector_args(parser)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    if fmt not in WRITERS:
+        parser.error(f"Unknown output format {fmt!r}; use --format")
+
+    if os.path.isdir(args.input):
+        tasks, work, static = _image_tasks(args.input, args.chunk), _process_image_chunk, True
+    else:
+        tasks, work, static = _video_tasks(args.input, args.chunk), _process_video_chunk, False
+
+    writer = WRITERS[fmt](args.output)
+    frames = 0
+    start = time.perf_counter()
+    init_args = (static, args)
+    try:
+        with Pool(args.workers, initializer=_init_worker, initargs=init_args) as pool:
+            # imap keeps chunks in order, so output rows stay sorted by frame
+            for count, rows in pool.imap(work, tasks):
+                writer.write(rows)
+                frames += count
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {frames} frames in {elapsed:.1f}s ({frames / max(elapsed, 1e-6):.1f} FPS)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import gc
+import json
+import sys
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from gestures import DEFAULT_RULES, RPS_RULES, GestureTable
+from landmarks import FINGER_TIPS, LandmarkBuffer, count_fingers, finger_states
+from motion import MotionBank
+from recording import RECORD_EXT, LandmarkRecording
+from render import Compositor
+from smoothing import LandmarkFilterBank
+from stabilizer import StabilizerBank
+from templates import TemplateClassifier
+
+# ===== Configuration =====
+SEED = 1234
+FRAMES = 2000          # Landmark frames per benchmark
+WARMUP = 200
+FRAME_SIZE = (720, 1280)
+TOLERANCE = 0.10       # Allowed p50 slowdown against the baseline
+REPEAT = 3             # Rounds per run; the fastest p50 of each benchmark is kept
+# =========================
+
+
+# ===== Landmark sequences =====
+def synthetic_hands(n_frames, seed=SEED, max_hands=2):
+    """Random but well-formed hands: each finger is up or curled at random."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n_frames):
+        hands = []
+        for h in range(rng.integers(0, max_hands + 1)):
+            wrist = np.array([300 + 600*h + rng.normal(0, 20), 600 + rng.normal(0, 20)])
+            lm = np.zeros((21, 3))
+            lm[:, :2] = wrist + rng.normal(0, 5, (21, 2))
+            for finger, tip in enumerate([4] + list(FINGER_TIPS)):
+                up = rng.random() < 0.5
+                x = wrist[0] - 120 + 60*finger
+                for joint in range(4):
+                    rise = 40 * (joint + 1) if up or joint < 2 else 80 - 20*joint
+                    lm[tip - 3 + joint, :2] = (x + (30*joint if finger == 0 and up else 0),
+                                               wrist[1] - 60 - rise)
+            hands.append({"lmList": lm.astype(int).tolist(),
+                          "bbox": (int(lm[:, 0].min()), int(lm[:, 1].min()),
+                                   int(np.ptp(lm[:, 0])), int(np.ptp(lm[:, 1]))),
+                          "type": "Right" if h == 0 else "Left"})
+        frames.append(hands)
+    return frames
+
+
+def load_landmarks(path):
+    # Replays a landmark recording or the JSONL written by batch.py
+    if path.endswith(RECORD_EXT):
+        recording = LandmarkRecording(path)
+        return [recording.hands(i) for i in range(len(recording))]
+    frames = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            lm = np.asarray(row["landmarks"]).reshape(21, 3).tolist()
+            frames[row["frame"]].append({"lmList": lm, "bbox": tuple(row["bbox"]),
+                                         "type": row["type"]})
+    return [frames[i] for i in sorted(frames)]
+# ==============================
+
+
+def _time(fn, items, warmup=WARMUP):
+    for item in items[:warmup]:
+        fn(item)
+    samples = np.empty(len(items))
+    perf_counter = time.perf_counter
+    gc.disable()
+    try:
+        start = perf_counter()
+        for i, item in enumerate(items):
+            t0 = perf_counter()
+            fn(item)
+            samples[i] = perf_counter() - t0
+        total = perf_counter() - start
+    finally:
+        gc.enable()
+    p50, p95, p99 = np.percentile(samples * 1e6, (50, 95, 99))
+    return {"calls": len(items), "per_sec": round(len(items) / total, 1),
+            "p50_us": round(p50, 3), "p95_us": round(p95, 3), "p99_us": round(p99, 3)}
+
+
+def run_benchmarks(frames):
+    results = {}
+    buffer = LandmarkBuffer(max_hands=2)
+
+    results["landmarks.load"] = _time(buffer.load, frames)
+
+    def fingers(hands):
+        lms, is_right = buffer.load(hands)
+        return finger_states(lms, is_right)
+    results["finger_states"] = _time(fingers, frames)
+
+    def counts(hands):
+        lms, is_right = buffer.load(hands)
+        return count_fingers(lms, is_right)
+    results["count_fingers (v2)"] = _time(counts, frames)
+
+    smoothing = LandmarkFilterBank(max_hands=2)
+    clock = iter(range(10**9))
+
+    def smooth(hands):
+        lms, _ = buffer.load(hands)
+        return smoothing.filter([hand["type"] for hand in buffer.hands], lms, next(clock) / 30)
+    results["smoothing"] = _time(smooth, frames)
+
+    motions = MotionBank()
+
+    def motion(hands):
+        lms, _ = buffer.load(hands)
+        t = next(clock) / 30
+        for key, lm in enumerate(lms):
+            motions.update(key, lm, t)
+    results["motion"] = _time(motion, frames)
+
+    for name, rules in (("gesture_app", DEFAULT_RULES), ("rps", RPS_RULES)):
+        table = GestureTable(rules)
+        results[f"classify ({name})"] = _time(lambda hands: table.classify_batch(fingers(hands)), frames)
+
+    table = GestureTable(DEFAULT_RULES)
+    labels = [table.classify_batch(fingers(hands)) for hands in frames]
+
+    # Every benchmark hand as a template of its rule label
+    templates = TemplateClassifier()
+    for hands, frame_labels in zip(frames, labels):
+        lms, is_right = buffer.load(hands)
+        for lm, right, label in zip(lms, is_right, frame_labels):
+            templates.add(label, lm[None], right[None])
+    templates.build()
+    results["classify (templates)"] = _time(lambda hands: templates.classify_batch(*buffer.load(hands)),
+                                            frames)
+    stabilizers = StabilizerBank(window=15)
+
+    def stabilize(frame_labels):
+        for key, label in enumerate(frame_labels):
+            stabilizers.update(key, label)
+    results["stabilizer"] = _time(stabilize, labels)
+
+    img = np.random.default_rng(SEED).integers(0, 255, FRAME_SIZE + (3,), np.uint8)
+    compositor = Compositor(alpha=0.7)
+
+    def composite(hands):
+        compositor.begin(img)
+        for hand in hands:
+            x, y, w, h = hand["bbox"]
+            compositor.line((x, y), (x + w, y + h), (255, 215, 0), 5)
+            compositor.putText("ROCK ON!", (x - 100, y - 100), cv2.FONT_HERSHEY_COMPLEX, 2,
+                               (255, 215, 0), 3)
+        compositor.end()
+        compositor.label(img, "Metal Horns", (FRAME_SIZE[1] // 2, 100),
+                         cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 215, 0), 5, center=True)
+    results["compositor"] = _time(composite, frames[:500], warmup=50)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<24} (new)")
+            continue
+        change = stats["p50_us"] / base["p50_us"] - 1 if base["p50_us"] else 0.0
+        flag = "REGRESSION" if change > tolerance else ""
+        print(f"{name:<24} p50 {base['p50_us']:9.2f} -> {stats['p50_us']:9.2f} us "
+              f"({change:+.1%}) {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hand-tracking hot paths without a camera")
+    parser.add_argument("--landmarks", help=f"replay landmarks from a {RECORD_EXT} recording or batch.py JSONL file")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="synthetic frames to generate")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="rounds; best p50 is kept")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as the new baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed p50 slowdown before failing (fraction)")
+    args = parser.parse_args(argv)
+
+    frames = load_landmarks(args.landmarks) if args.landmarks else synthetic_hands(args.frames)
+    results = {}
+    for _ in range(args.repeat):
+        for name, stats in run_benchmarks(frames).items():
+            if name not in results or stats["p50_us"] < results[name]["p50_us"]:
+                results[name] = stats
+
+    print(f"{'benchmark':<24} {'calls/s':>12} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for name, stats in results.items():
+        print(f"{name:<24} {stats['per_sec']:>12} {stats['p50_us']:>9} "
+              f"{stats['p95_us']:>9} {stats['p99_us']:>9}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
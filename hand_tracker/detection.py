@@ -0,0 +1,332 @@
+import time
+
+import cv2
+import numpy as np
+
+from landmarks import draw_hands
+
+
+def hand_detector(*args, **kwargs):
+    # cvzone's HandDetector, imported on first use: cvzone pulls in MediaPipe,
+    # the slowest import at startup, so it can load alongside the camera
+    from cvzone.HandTrackingModule import HandDetector
+    return HandDetector(*args, **kwargs)
+
+
+def warm_up(detector, shape):
+    # One inference on a blank frame, so graph setup isn't paid on the first real frame
+    find_hands(detector, np.zeros(shape, np.uint8), draw=False)
+
+
+def find_hands(detector, img, draw=False, flipType=True):
+    # cvzone returns (hands, img) or just hands depending on version and draw
+    result = detector.findHands(img, draw=draw, flipType=flipType)
+    hands = result[0] if isinstance(result, tuple) else result
+    # MediaPipe's handedness score per hand, used to weight gesture votes
+    handedness = getattr(getattr(detector, "results", None), "multi_handedness", None)
+    if handedness and len(handedness) == len(hands):
+        for hand, h in zip(hands, handedness):
+            hand.setdefault("score", h.classification[0].score)
+    return hands
+
+
+def scale_hand(hand, fx, fy, dx=0, dy=0):
+    # Map a hand found on a resized/cropped image back to full-frame pixels
+    hand["lmList"] = [[int(p[0]*fx + dx), int(p[1]*fy + dy), int(p[2]*fx)] for p in hand["lmList"]]
+    x, y, w, h = hand["bbox"]
+    hand["bbox"] = (int(x*fx + dx), int(y*fy + dy), int(w*fx), int(h*fy))
+    if "center" in hand:
+        cx, cy = hand["center"]
+        hand["center"] = (int(cx*fx + dx), int(cy*fy + dy))
+    return hand
+
+
+class ScaledDetector:
+    """Runs the wrapped detector on a downscaled frame.
+
+    Landmarks and bboxes are mapped back to the full-resolution frame, so
+    callers see the same coordinates as before. Resized frames go into
+    buffers allocated once per size. With ``adaptive=True`` the scale drops
+    by ``step`` whenever the averaged detection time exceeds ``budget_ms``
+    and creeps back up when there is headroom.
+    """
+
+    def __init__(self, detector, scale=0.5, adaptive=False, budget_ms=33.0,
+                 min_scale=0.25, max_scale=1.0, step=0.05):
+        self.detector = detector
+        self.scale = scale
+        self.adaptive = adaptive
+        self.budget_ms = budget_ms
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+        self.detect_ms = 0.0   # Moving average of detection time
+        self._buffers = {}
+        self._cooldown = 0
+
+    def _resize(self, img):
+        h, w = img.shape[:2]
+        size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+        buffer = self._buffers.get(size)
+        if buffer is None:
+            if len(self._buffers) >= 8:   # Input sizes vary (e.g. ROI crops); keep the cache small
+                self._buffers.clear()
+            buffer = np.empty((size[1], size[0]) + img.shape[2:], img.dtype)
+            self._buffers[size] = buffer
+        return cv2.resize(img, size, dst=buffer, interpolation=cv2.INTER_AREA)
+
+    def _adapt(self):
+        if self._cooldown:
+            self._cooldown -= 1
+            return
+        if self.detect_ms > self.budget_ms and self.scale > self.min_scale:
+            self.scale = max(self.min_scale, round(self.scale - self.step, 2))
+        elif self.detect_ms < 0.6 * self.budget_ms and self.scale < self.max_scale:
+            self.scale = min(self.max_scale, round(self.scale + self.step, 2))
+        else:
+            return
+        self._cooldown = 15   # Let the average settle at the new scale
+
+    def stats(self):
+        return {"scale": self.scale, "detect_ms": round(self.detect_ms, 2)}
+
+    def findHands(self, img, draw=True, flipType=True):
+        small = img if self.scale >= 1.0 else self._resize(img)
+
+        start = time.perf_counter()
+        hands = find_hands(self.detector, small, draw=False, flipType=flipType)
+        self.detect_ms = 0.9 * self.detect_ms + 100 * (time.perf_counter() - start)
+
+        if small is not img:
+            fx = img.shape[1] / small.shape[1]
+            fy = img.shape[0] / small.shape[0]
+            for hand in hands:
+                scale_hand(hand, fx, fy)
+        if draw:
+            draw_hands(img, hands)
+        if self.adaptive:
+            self._adapt()
+        return hands, img
+
+
+def _base_detector(detector):
+    while hasattr(detector, "detector"):
+        detector = detector.detector
+    return detector
+
+
+def hand_confidence(detector):
+    # Lowest handedness score from the last MediaPipe run, 1.0 if unavailable
+    results = getattr(_base_detector(detector), "results", None)
+    handedness = getattr(results, "multi_handedness", None)
+    if not handedness:
+        return 1.0
+    return min(h.classification[0].score for h in handedness)
+
+
+class RoiDetector:
+    """Tracks hands by detecting only inside a padded crop around the last bboxes.
+
+    A full-frame detection runs every ``redetect_every`` frames, when no
+    hand was seen last frame, and whenever the crop loses a hand or the
+    hand confidence drops below ``min_confidence``. ``redetect_ratio``
+    reports how often that happened.
+    """
+
+    def __init__(self, detector, redetect_every=10, padding=0.3, min_confidence=0.6, align=64):
+        self.detector = detector
+        self.redetect_every = redetect_every
+        self.padding = padding
+        self.min_confidence = min_confidence
+        self.align = align   # Crop sizes are rounded up to this, so downstream buffers are reused
+        self.frames = 0
+        self.redetections = 0
+        self._roi = None
+        self._expected = 0
+        self._since_keyframe = 0
+
+    @property
+    def redetect_ratio(self):
+        return self.redetections / self.frames if self.frames else 0.0
+
+    def stats(self):
+        return {"frames": self.frames, "redetections": self.redetections,
+                "redetect_ratio": round(self.redetect_ratio, 3)}
+
+    def _roi_for(self, hands, width, height):
+        x0 = min(h["bbox"][0] for h in hands)
+        y0 = min(h["bbox"][1] for h in hands)
+        x1 = max(h["bbox"][0] + h["bbox"][2] for h in hands)
+        y1 = max(h["bbox"][1] + h["bbox"][3] for h in hands)
+        pad = self.padding * max(x1 - x0, y1 - y0)
+        w = min(width, -(-int(x1 - x0 + 2*pad) // self.align) * self.align)
+        h = min(height, -(-int(y1 - y0 + 2*pad) // self.align) * self.align)
+        cx, cy = (x0 + x1) // 2, (y0 + y1) // 2
+        left = int(min(max(cx - w // 2, 0), width - w))
+        top = int(min(max(cy - h // 2, 0), height - h))
+        return left, top, left + w, top + h
+
+    def findHands(self, img, draw=True, flipType=True):
+        height, width = img.shape[:2]
+        self.frames += 1
+        hands = None
+
+        if self._roi is not None and self._since_keyframe < self.redetect_every:
+            x0, y0, x1, y1 = self._roi
+            hands = find_hands(self.detector, img[y0:y1, x0:x1], draw=False, flipType=flipType)
+            if len(hands) < self._expected or hand_confidence(self.detector) < self.min_confidence:
+                hands = None   # Lost track, fall back to the full frame
+            else:
+                for hand in hands:
+                    scale_hand(hand, 1, 1, x0, y0)
+                self._since_keyframe += 1
+
+        if hands is None:
+            hands = find_hands(self.detector, img, draw=False, flipType=flipType)
+            self.redetections += 1
+            self._since_keyframe = 0
+
+        self._expected = len(hands)
+        self._roi = self._roi_for(hands, width, height) if hands else None
+        if draw:
+            draw_hands(img, hands)
+        return hands, img
+
+
+class MotionGate:
+    """Skips detection on frames that barely changed since the last detection.
+
+    Change is the mean absolute difference between small grayscale
+    thumbnails of the frame and of the last detected frame; with
+    ``hands_only=True`` it is measured in padded boxes around the last
+    hands (the whole frame when there were none), and the box that changed
+    most counts. Below ``threshold`` grey levels the last hands are
+    returned again, at most ``max_skip`` frames in a row. ``skip_ratio``
+    reports how often that happened.
+    """
+
+    def __init__(self, detector, threshold=2.0, max_skip=10, hands_only=False, width=64,
+                 padding=0.2):
+        self.detector = detector
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.hands_only = hands_only
+        self.width = width
+        self.padding = padding
+        self.frames = 0
+        self.skipped = 0
+        self._hands = None
+        self._run = 0
+        self._small = self._gray = self._reference = self._diff = None
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def stats(self):
+        return {"gated_frames": self.frames, "skipped": self.skipped,
+                "skip_ratio": round(self.skip_ratio, 3)}
+
+    def _thumbnail(self, img):
+        # Grayscale thumbnail in buffers allocated once per input size
+        h, w = img.shape[:2]
+        size = (self.width, max(1, round(h * self.width / w)))
+        if self._gray is None or self._gray.shape != size[::-1]:
+            self._small = np.empty(size[::-1] + img.shape[2:], img.dtype)
+            self._gray, self._reference, self._diff = (np.empty(size[::-1], np.uint8)
+                                                       for _ in range(3))
+            self._hands = None   # Nothing to compare against yet
+        if img.ndim == 2:
+            return cv2.resize(img, size, dst=self._gray, interpolation=cv2.INTER_AREA)
+        cv2.resize(img, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def _change(self, gray, img):
+        diff = cv2.absdiff(gray, self._reference, dst=self._diff)
+        if not (self.hands_only and self._hands):
+            return cv2.mean(diff)[0]
+        f = gray.shape[1] / img.shape[1]
+        change = 0.0
+        for hand in self._hands:
+            x, y, w, h = hand["bbox"]
+            pad = self.padding * max(w, h)
+            x0, y0 = max(int((x - pad) * f), 0), max(int((y - pad) * f), 0)
+            x1, y1 = int((x + w + pad) * f) + 1, int((y + h + pad) * f) + 1
+            region = diff[y0:y1, x0:x1]
+            if region.size:
+                change = max(change, cv2.mean(region)[0])
+        return change
+
+    def findHands(self, img, draw=True, flipType=True):
+        self.frames += 1
+        gray = self._thumbnail(img)
+        if (self._hands is not None and self._run < self.max_skip
+                and self._change(gray, img) < self.threshold):
+            self._run += 1
+            self.skipped += 1
+            if draw:
+                draw_hands(img, self._hands)
+            return self._hands, img
+
+        self._hands = find_hands(self.detector, img, draw=draw, flipType=flipType)
+        self._run = 0
+        self._gray, self._reference = self._reference, self._gray   # Keep it as the reference
+        return self._hands, img
+
+
+def detector_stats(detector):
+    # Merged stats() of every wrapper in the chain
+    stats = {}
+    while detector is not None:
+        if hasattr(detector, "stats"):
+            stats.update(detector.stats())
+        detector = getattr(detector, "detector", None)
+    return stats
+
+
+def print_detector_stats(detector):
+    stats = detector_stats(detector)
+    if stats:
+        print("Detector: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+def add_detector_args(parser):
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="run detection on a frame downscaled by this factor")
+    parser.add_argument("--adaptive-scale", action="store_true",
+                        help="lower/raise --scale to keep detection within --frame-budget-ms "
+                             "(not with --detector-procs)")
+    parser.add_argument("--frame-budget-ms", type=float, default=33.0,
+                        help="detection time budget for --adaptive-scale")
+    parser.add_argument("--roi-track", type=int, default=0, metavar="N",
+                        help="detect inside a crop around the last hands, full frame every N frames "
+                             "(not with --detector-procs)")
+    parser.add_argument("--motion-gate", type=float, default=0.0, metavar="LEVELS",
+                        help="reuse the last hands while the frame changes less than this "
+                             "(mean grey levels on a thumbnail; not with --detector-procs)")
+    parser.add_argument("--gate-max-skip", type=int, default=10, metavar="N",
+                        help="detect at least every N+1 frames with --motion-gate")
+    parser.add_argument("--gate-hands", action="store_true",
+                        help="measure --motion-gate change only around the last hands")
+    return parser
+
+
+def load_detector(make_detector, args, warmup_shape=None):
+    # Build, warm up and wrap; picklable via functools.partial for worker processes
+    detector = make_detector()
+    if warmup_shape:
+        warm_up(detector, warmup_shape)
+    return wrap_detector(detector, args)
+
+
+def wrap_detector(detector, args):
+    # Apply the detector options from add_detector_args
+    if args.scale < 1.0 or args.adaptive_scale:
+        detector = ScaledDetector(detector, scale=args.scale, adaptive=args.adaptive_scale,
+                                  budget_ms=args.frame_budget_ms)
+    if args.roi_track:
+        detector = RoiDetector(detector, redetect_every=args.roi_track)
+    if args.motion_gate > 0:
+        detector = MotionGate(detector, threshold=args.motion_gate, max_skip=args.gate_max_skip,
+                              hands_only=args.gate_hands)
+    return detector
@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+# ===== Configuration =====
+QUEUE_SIZE = 256   # Ordered events kept per subscriber before the oldest are dropped
+# =========================
+
+
+class _Subscriber:
+    """Outbox of one subscriber.
+
+    Ordered events (gesture changes) wait in a bounded deque; keyed events
+    (landmarks) are coalesced so only the newest per key is sent. A slow
+    subscriber therefore skips stale poses instead of falling behind. Each
+    batch goes out in publishing order (``seq``), so a coalesced pose never
+    arrives after a later event, such as its hand leaving.
+    """
+
+    def __init__(self, maxsize):
+        self.ordered = deque(maxlen=maxsize)
+        self.latest = {}
+        self.ready = asyncio.Event()
+
+    def offer(self, seq, text, key=None):
+        if key is None:
+            self.ordered.append((seq, text))   # Full deque drops its oldest event
+        else:
+            self.latest[key] = (seq, text)
+        self.ready.set()
+
+    async def drain(self):
+        await self.ready.wait()
+        self.ready.clear()
+        batch = sorted([*self.ordered, *self.latest.values()])
+        self.ordered.clear()
+        self.latest.clear()
+        return [text for _, text in batch]
+
+
+class EventPublisher:
+    """Sends JSON events to subscribers over a Unix socket and/or a WebSocket.
+
+    The asyncio loop runs on its own thread. ``publish`` only schedules the
+    event on that loop, so the capture and render threads never wait for a
+    subscriber. Each event is encoded once and handed to every subscriber's
+    outbox. The Unix socket sends one JSON object per line; the WebSocket
+    sends one per message and needs the ``websockets`` package.
+    """
+
+    def __init__(self, unix_path=None, ws_address=None, queue_size=QUEUE_SIZE):
+        self.unix_path = unix_path
+        self.ws_address = ws_address
+        self.queue_size = queue_size
+        self.published = 0
+        self._subscribers = set()
+        self._retained = {}   # Last retained event per key, replayed to new subscribers
+        self._servers = []
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        except BaseException:
+            self.close()
+            raise
+        atexit.register(self.close)
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, event, key=None, retain=None):
+        """Thread-safe and non-blocking.
+
+        Events with a ``key`` are coalesced per subscriber. An event with a
+        ``retain`` key is also kept and sent first to later subscribers.
+        """
+        if self._subscribers or retain is not None:
+            self.loop.call_soon_threadsafe(self._dispatch, event, key, retain)
+
+    def forget(self, retain):
+        # Stop replaying a retained event to new subscribers
+        self.loop.call_soon_threadsafe(self._retained.pop, retain, None)
+
+    def _dispatch(self, event, key, retain):
+        text = json.dumps(event, ensure_ascii=False)
+        seq = self.published
+        if retain is not None:
+            self._retained[retain] = seq, text
+        self.published += 1
+        for subscriber in self._subscribers:
+            subscriber.offer(seq, text, key)
+
+    async def _start(self):
+        if self.unix_path:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)   # Stale socket from an earlier run
+            self._servers.append(await asyncio.start_unix_server(self._serve_unix,
+                                                                 path=self.unix_path))
+        if self.ws_address:
+            try:
+                import websockets
+            except ImportError:
+                raise SystemExit("WebSocket events need websockets: pip install websockets")
+            host, _, port = self.ws_address.rpartition(":")
+            self._servers.append(await websockets.serve(self._serve_ws, host or "localhost",
+                                                        int(port)))
+
+    async def _pump(self, send):
+        subscriber = _Subscriber(self.queue_size)
+        for seq, text in self._retained.values():
+            subscriber.offer(seq, text)
+        self._subscribers.add(subscriber)
+        try:
+            while True:
+                for text in await subscriber.drain():
+                    await send(text)
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def _serve_unix(self, reader, writer):
+        async def send(text):
+            writer.write(text.encode("utf-8") + b"\n")
+            await writer.drain()
+
+        try:
+            await self._pump(send)
+        except (ConnectionError, asyncio.CancelledError):
+            pass   # Client gone, or the publisher is closing
+        finally:
+            writer.close()
+
+    async def _serve_ws(self, websocket):
+        from websockets.exceptions import ConnectionClosed
+        try:
+            await self._pump(websocket.send)
+        except ConnectionClosed:
+            pass
+
+    async def _stop(self):
+        for server in self._servers:
+            server.close()
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+
+    def close(self):
+        if not self._thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result(timeout=2.0)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=2.0)
+            if self.unix_path and os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+
+
+class GestureEvents:
+    """Turns per-frame results into events.
+
+    Hands are identified by ``keys`` (track ids); their Left/Right
+    ``sides`` are added to gesture events when given. ``gesture`` is sent
+    when a hand's stable gesture changes, with ``"gesture": null`` when the
+    hand leaves; new subscribers get the current gesture of each hand
+    first. ``motion`` is sent once per recognized motion gesture (swipe,
+    circle, ...) and ``round`` once per decided rock-paper-scissors round.
+    ``landmarks`` is sent every frame but coalesced per hand, and only
+    built while someone listens. ``time`` is the frame's capture time
+    (``time.perf_counter``, or as recorded for replays). Without a
+    publisher ``update`` does nothing.
+    """
+
+    def __init__(self, publisher=None):
+        self.publisher = publisher
+        self._labels = {}
+
+    def update(self, frame, keys, labels, landmarks=None, sides=None):
+        publisher = self.publisher
+        if publisher is None:
+            return
+        seen = set()
+        for i, (key, label) in enumerate(zip(keys, labels)):
+            seen.add(key)
+            if self._labels.get(key) != label:
+                self._labels[key] = label
+                event = {"type": "gesture", "frame": frame.index,
+                         "time": round(frame.timestamp, 4), "hand": key, "gesture": label}
+                if sides is not None:
+                    event["side"] = sides[i]
+                publisher.publish(event, retain=key)
+        for key in [key for key in self._labels if key not in seen]:
+            del self._labels[key]
+            publisher.publish({"type": "gesture", "frame": frame.index,
+                               "time": round(frame.timestamp, 4), "hand": key, "gesture": None})
+            publisher.forget(key)
+        if landmarks is not None and publisher.subscribers:
+            for key, lm in zip(keys, landmarks):
+                publisher.publish({"type": "landmarks", "frame": frame.index,
+                                   "time": round(frame.timestamp, 4), "hand": key,
+                                   "landmarks": np.round(lm, 1).ravel().tolist()},
+                                  key=("landmarks", key))
+
+    def round_result(self, frame, result):
+        if self.publisher is not None:
+            self.publisher.publish({"type": "round", "frame": frame.index,
+                                    "time": round(frame.timestamp, 4), **result})
+
+    def motion(self, frame, key, label):
+        if self.publisher is not None:
+            self.publisher.publish({"type": "motion", "frame": frame.index,
+                                    "time": round(frame.timestamp, 4), "hand": key,
+                                    "gesture": label})
+
+
+def add_event_args(parser):
+    parser.add_argument("--events-unix", default=None, metavar="PATH",
+                        help="publish gesture/landmark events on this Unix socket (JSON lines)")
+    parser.add_argument("--events-ws", default=None, metavar="HOST:PORT",
+                        help="publish gesture/landmark events on a WebSocket (needs websockets)")
+    return parser
+
+
+def open_events(args):
+    if not (args.events_unix or args.events_ws):
+        return GestureEvents()
+    return GestureEvents(EventPublisher(args.events_unix, args.events_ws))
+
+
+async def _subscribe(args):
+    if args.unix:
+        reader, _ = await asyncio.open_unix_connection(args.unix)
+        while line := await reader.readline():
+            print(line.decode("utf-8").rstrip())
+    else:
+        import websockets
+        async with websockets.connect(args.ws) as websocket:
+            async for message in websocket:
+                print(message)
+
+
+def main(argv=None):
+    # Minimal subscriber that prints every event, for trying the API out
+    parser = argparse.ArgumentParser(description="Print events published by a tracker app")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--unix", metavar="PATH", help="Unix socket given to --events-unix")
+    group.add_argument("--ws", metavar="URL", help="WebSocket URL, e.g. ws://localhost:8765")
+    try:
+        asyncio.run(_subscribe(parser.parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
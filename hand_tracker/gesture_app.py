@@ -1,14 +1,25 @@
+from functools import partial
+
 import cv2
-import time
 import numpy as np
-from cvzone.HandTrackingModule import HandDetector
-from collections import deque
+from detection import hand_detector, print_detector_stats
+from events import open_events
+from gestures import GestureTable, parse_rule
+from landmarks import LandmarkBuffer, finger_states
+from motion import MotionBank
+from pipeline import Pipeline, build_arg_parser, open_input, pipeline_options
+from render import Compositor
+from session import open_session
+from smoothing import LandmarkFilterBank
+from stabilizer import StabilizerBank
+from startup import startup
+from templates import add_template_args, open_templates
+from tracking import HandTracker
 
 # ===== Configuration =====
 CAM_WIDTH = 1280
 CAM_HEIGHT = 720
 GESTURE_COLORS = {
-    'Rock ✊': (0, 0, 255),
     'Paper 🖐️': (0, 255, 0),
     'Scissors ✌️': (255, 0, 0),
     'I Love You 🤟': (255, 0, 255),
@@ -21,161 +32,143 @@ GESTURE_COLORS = {
     'Gun 🔫': (100, 100, 100),
     'Unknown': (255, 255, 255)
 }
+MOTION_SHOW_SECONDS = 1.0   # How long a recognized swipe/circle/wave stays on screen
 # =========================
 
-def count_fingers(lmList, hand_type):
-    fingers = []
-    if len(lmList) < 21:
-        return [False]*5
+def main(argv=None):
+    parser = build_arg_parser("Gesture Party")
+    parser.add_argument("--gesture", action="append", default=[], metavar="NAME=PATTERN",
+                        help="extra gesture, e.g. 'Point ☝️=01000' (thumb..pinky, 1 up, 0 down, . either)")
+    add_template_args(parser)
+    args = parser.parse_args(argv)
+    if args.learn and not args.templates:
+        parser.error("--learn needs --templates PATH to save into")
+    source, detector = open_input(args, CAM_WIDTH, CAM_HEIGHT,
+                                  partial(hand_detector, maxHands=2, detectionCon=0.9))
     
-    # Thumb check
-    thumb_tip = (lmList[4][0], lmList[4][1])
-    thumb_base = (lmList[3][0], lmList[3][1])
-    thumb_up = thumb_tip[0] > thumb_base[0] if hand_type == "Right" else thumb_tip[0] < thumb_base[0]
-    fingers.append(thumb_up)
+    stabilizers = StabilizerBank(window=5)  # One vote per hand; short, landmarks are smoothed
+    landmarks = LandmarkBuffer(max_hands=2)
+    tracker = HandTracker()  # Stable hand ids across frames
+    motions = MotionBank()  # Swipes, circles, waves and pinch-drags per hand
+    shown_motion = ["", 0.0]  # Last motion gesture and when it was seen
+    smoothing = LandmarkFilterBank(max_hands=2, enabled=not args.no_smoothing)
+    gestures = GestureTable()
+    templates = open_templates(args.templates) if args.templates else None
+    learning = [bool(args.learn) and args.headless]  # Toggled with 'r'
+    compositor = Compositor(alpha=0.7)  # Reuses its buffers every frame
+    events = open_events(args)  # Gesture changes/landmarks for other programs
+    recorder = open_session(args)  # Saves what is shown, off the render thread
+    for rule in args.gesture:
+        gestures.register(*parse_rule(rule))
     
-    # Other fingers
-    for tip in [8, 12, 16, 20]:
-        if tip-2 >= len(lmList):
-            fingers.append(False)
-            continue
-        fingers.append(lmList[tip][1] < lmList[tip-2][1])
+    def process(img):
+        return detector.findHands(img, draw=True)
     
-    return fingers
+    def render(frame, result):
+        hands, img = result
+        profiler = pipeline.profiler
 
-def detect_gesture(finger_states, lmList):
-    # Metal Horns 🤘 (Index + Pinky up)
-    if finger_states[1] and finger_states[4] and not any(finger_states[2:4]):
-        return 'Metal Horns 🤘'
-    
-    # Phone 🤙 (Thumb + Pinky up)
-    if finger_states[0] and finger_states[4] and not any(finger_states[1:4]):
-        return 'Phone 🤙'
-    
-    # Spidey Web 🕷️ (Middle + Ring down)
-    if finger_states[1] and not finger_states[2] and not finger_states[3] and finger_states[4]:
-        return 'Spidey 🕷️'
-    
-    # Gun 🔫 (Index up + thumb up)
-    if finger_states[0] and finger_states[1] and not any(finger_states[2:]):
-        return 'Gun 🔫'
-    
-    # Thumbs Up/Down 👍👎
-    if sum(finger_states[1:]) == 0:
-        return 'Thumbs Up 👍' if finger_states[0] else 'Thumbs Down 👎'
-    
-    # Existing gestures
-    if (finger_states[0] and finger_states[1] and not finger_states[2] 
-        and not finger_states[3] and finger_states[4]):
-        return 'I Love You 🤟'
-    
-    if finger_states[2] and not any([finger_states[1], finger_states[3], finger_states[4]]):
-        return 'Mood 😈'
-    
-    # Rock-Paper-Scissors
-    total = sum(finger_states)
-    if total == 0: return 'Rock ✊'
-    if total == 5: return 'Paper 🖐️'
-    if total == 2 and finger_states[1] and finger_states[2]: 
-        return 'Scissors ✌️'
-    
-    return 'Unknown'
+        with profiler.measure(frame.index, "classify"):
+            lms, is_right = landmarks.load(hands)
+            track_ids = tracker.update(landmarks.hands).tolist()
+            for track_id in tracker.ended:
+                stabilizers.discard(track_id)
+                motions.discard(track_id)
+            smoothing.filter(track_ids, lms, frame.timestamp)
+            if templates is None:
+                labels = gestures.classify_batch(finger_states(lms, is_right))
+            else:
+                labels = templates.classify_batch(lms, is_right)
+                if learning[0]:
+                    templates.add(args.learn, lms, is_right)
+            stable_gestures = [stabilizers.update(track_id, gesture, hand.get("score", 1.0))
+                               for track_id, gesture, hand in zip(track_ids, labels,
+                                                                  landmarks.hands)]
+            events.update(frame, track_ids, stable_gestures, lms,
+                          [hand["type"] for hand in landmarks.hands])
+            for track_id, lmList in zip(track_ids, lms):
+                motion = motions.update(track_id, lmList, frame.timestamp)
+                if motion:
+                    shown_motion[:] = motion, frame.timestamp
+                    events.motion(frame, track_id, motion)
+            if any(gesture != 'Unknown' for gesture in stable_gestures):
+                startup.mark("first_gesture")
 
-def main():
-    cap = cv2.VideoCapture(0)
-    cap.set(3, CAM_WIDTH)
-    cap.set(4, CAM_HEIGHT)
-    
-    detector = HandDetector(maxHands=2, detectionCon=0.9)
-    gesture_history = deque(maxlen=15)
-    
-    while True:
-        success, img = cap.read()
-        if not success:
-            print("Failed to capture frame")
-            time.sleep(0.1)
-            continue
-            
-        img = cv2.flip(img, 1)
-        hands, img = detector.findHands(img, draw=True)
-        effect_img = img.copy()
+        with profiler.measure(frame.index, "effects"):
+            compositor.begin(img)
+            for hand, lmList, gesture in zip(landmarks.hands, lms, labels):
+                bbox = hand["bbox"]
+                
+                # Metal Horns effect
+                if gesture == 'Metal Horns 🤘':
+                    pt1 = (int(lmList[8][0]), int(lmList[8][1]))
+                    pt2 = (int(lmList[20][0]), int(lmList[20][1]))
+                    compositor.line(pt1, pt2, (255,215,0), 5)
+                    compositor.putText("ROCK ON!", (bbox[0]-100, bbox[1]-100),
+                            cv2.FONT_HERSHEY_COMPLEX, 2, (255,215,0), 3)
+                
+                # Phone effect
+                if gesture == 'Phone 🤙':
+                    compositor.putText("CALL ME!", (bbox[0], bbox[1]-100),
+                            cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, 2, (0,255,255), 3)
+                    compositor.rectangle((bbox[0]-50, bbox[1]-200),
+                                (bbox[0]+50, bbox[1]+100), (0,255,255), 3)
+                
+                # Spidey effect (no built-in rule: its old pattern was identical to
+                # Metal Horns, so it only fires when registered with --gesture)
+                if gesture == 'Spidey 🕷️':
+                    for connection in [(8,12), (12,16), (16,20)]:
+                        pt1 = (int(lmList[connection[0]][0]), int(lmList[connection[0]][1]))
+                        pt2 = (int(lmList[connection[1]][0]), int(lmList[connection[1]][1]))
+                        compositor.line(pt1, pt2, (255,0,0), 3)
+                    compositor.putText("🕷️", (bbox[0]+50, bbox[1]-100),
+                            cv2.FONT_HERSHEY_SIMPLEX, 2, (255,0,0), 3)
+                
+                # Gun effect
+                if gesture == 'Gun 🔫':
+                    compositor.putText("BANG!", (bbox[0], bbox[1]-100),
+                            cv2.FONT_HERSHEY_COMPLEX, 2, (100,100,100), 3)
+                    compositor.circle((int(lmList[8][0]), int(lmList[8][1])),
+                            30, (255,255,0), cv2.FILLED)
+
+        with profiler.measure(frame.index, "blend"):
+            # Blend effects (only the areas they touched)
+            img = compositor.end()
+        
+            # Draw one stable gesture per visible hand
+            for row, stable_gesture in enumerate(stable_gestures or ['Unknown']):
+                compositor.label(img, stable_gesture, 
+                        (img.shape[1]//2, 100 + 100*row),
+                        cv2.FONT_HERSHEY_SIMPLEX, 3, 
+                        GESTURE_COLORS.get(stable_gesture, (255,255,255)), 5, center=True)
+
+            if learning[0]:
+                # The count changes every frame, so draw it directly rather than cache a sprite
+                cv2.putText(img, f"REC {args.learn} ({len(templates)})", (20, 60),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0,0,255), 3)
 
-        try:
-            if hands:
-                for hand in hands:
-                    if not all(key in hand for key in ["lmList", "bbox", "type"]):
-                        continue
-                        
-                    lmList = hand["lmList"]
-                    bbox = hand["bbox"]
-                    hand_type = hand["type"]
-                    
-                    if len(lmList) < 21:
-                        continue
-                    
-                    # Convert 3D points to 2D
-                    lmList_2d = [[point[0], point[1]] for point in lmList]
-                    
-                    finger_states = count_fingers(lmList, hand_type)
-                    gesture = detect_gesture(finger_states, lmList)
-                    gesture_history.append(gesture)
-                    
-                    # Metal Horns effect
-                    if gesture == 'Metal Horns 🤘':
-                        pt1 = (int(lmList_2d[8][0]), int(lmList_2d[8][1]))
-                        pt2 = (int(lmList_2d[20][0]), int(lmList_2d[20][1]))
-                        cv2.line(effect_img, pt1, pt2, (255,215,0), 5)
-                        cv2.putText(effect_img, "ROCK ON!", (bbox[0]-100, bbox[1]-100),
-                                cv2.FONT_HERSHEY_COMPLEX, 2, (255,215,0), 3)
-                    
-                    # Phone effect
-                    if gesture == 'Phone 🤙':
-                        cv2.putText(effect_img, "CALL ME!", (bbox[0], bbox[1]-100),
-                                cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, 2, (0,255,255), 3)
-                        cv2.rectangle(effect_img, (bbox[0]-50, bbox[1]-200),
-                                    (bbox[0]+50, bbox[1]+100), (0,255,255), 3)
-                    
-                    # Spidey effect
-                    if gesture == 'Spidey 🕷️':
-                        for connection in [(8,12), (12,16), (16,20)]:
-                            pt1 = (int(lmList_2d[connection[0]][0]), int(lmList_2d[connection[0]][1]))
-                            pt2 = (int(lmList_2d[connection[1]][0]), int(lmList_2d[connection[1]][1]))
-                            cv2.line(effect_img, pt1, pt2, (255,0,0), 3)
-                        cv2.putText(effect_img, "🕷️", (bbox[0]+50, bbox[1]-100),
-                                cv2.FONT_HERSHEY_SIMPLEX, 2, (255,0,0), 3)
-                    
-                    # Gun effect
-                    if gesture == 'Gun 🔫':
-                        cv2.putText(effect_img, "BANG!", (bbox[0], bbox[1]-100),
-                                cv2.FONT_HERSHEY_COMPLEX, 2, (100,100,100), 3)
-                        cv2.circle(effect_img, (int(lmList_2d[8][0]), int(lmList_2d[8][1])),
-                                30, (255,255,0), cv2.FILLED)
+            motion, seen = shown_motion
+            if motion and frame.timestamp - seen < MOTION_SHOW_SECONDS:
+                compositor.label(img, motion, (img.shape[1]//2, img.shape[0] - 80),
+                        cv2.FONT_HERSHEY_SIMPLEX, 2, (0,255,255), 4, center=True)
+            recorder.write(frame, img, stable_gestures)
 
-            # Blend effects
-            alpha = 0.7
-            img = cv2.addWeighted(img, 1-alpha, effect_img, alpha, 0)
-            
-            # Get stable gesture
-            stable_gesture = max(set(gesture_history), 
-                            key=lambda x: list(gesture_history).count(x)) if gesture_history else 'Unknown'
-            
-            # Draw gesture display
-            text_size = cv2.getTextSize(stable_gesture, cv2.FONT_HERSHEY_SIMPLEX, 3, 5)[0]
-            cv2.putText(img, stable_gesture, 
-                    ((CAM_WIDTH - text_size[0])//2, 100),
-                    cv2.FONT_HERSHEY_SIMPLEX, 3, 
-                    GESTURE_COLORS.get(stable_gesture, (255,255,255)), 5)
-            
-            cv2.imshow("Gesture Party 🎉", img)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        return img
 
-        except Exception as e:
-            print(f"Error: {e}")
-            continue
+    def on_key(key):
+        if key == ord('r') and args.learn:
+            learning[0] = not learning[0]
+            if not learning[0]:
+                templates.build()   # Use what was just recorded
 
-    cap.release()
-    cv2.destroyAllWindows()
+    pipeline = Pipeline(source, process, render, window="Gesture Party 🎉", flip=True,
+                        on_key=on_key, **pipeline_options(args))
+    pipeline.run()
+    if args.learn:
+        templates.save(args.templates)
+        print(f"Saved {len(templates)} templates to {args.templates}")
+    print_detector_stats(detector)
+    recorder.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
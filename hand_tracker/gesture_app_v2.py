@@ -1,8 +1,18 @@
+from functools import partial
+
 import cv2
-import time
 import numpy as np
-from cvzone.HandTrackingModule import HandDetector
-from collections import deque
+from detection import hand_detector, print_detector_stats
+from events import open_events
+from gestures import GestureTable, parse_rule
+from landmarks import LandmarkBuffer, finger_states
+from pipeline import Pipeline, build_arg_parser, open_input, pipeline_options
+from render import Compositor
+from session import open_session
+from smoothing import LandmarkFilterBank
+from stabilizer import StabilizerBank
+from startup import startup
+from tracking import HandTracker
 
 # ===== Configuration =====
 CAM_WIDTH = 1280
@@ -20,133 +30,81 @@ GESTURE_COLORS = {
 }
 # =========================
 
-def count_fingers(lmList, hand_type):
-    fingers = []
-    if len(lmList) < 21:
-        return [False]*5
+def main(argv=None):
+    parser = build_arg_parser("Gesture Control")
+    parser.add_argument("--gesture", action="append", default=[], metavar="NAME=PATTERN",
+                        help="extra gesture, e.g. 'Point ☝️=01000' (thumb..pinky, 1 up, 0 down, . either)")
+    args = parser.parse_args(argv)
+    source, detector = open_input(args, CAM_WIDTH, CAM_HEIGHT,
+                                  partial(hand_detector, maxHands=2, detectionCon=0.9))
     
-    # Thumb check
-    thumb_tip = (lmList[4][0], lmList[4][1])
-    thumb_base = (lmList[3][0], lmList[3][1])
-    thumb_up = thumb_tip[0] > thumb_base[0] if hand_type == "Right" else thumb_tip[0] < thumb_base[0]
-    fingers.append(thumb_up)
+    stabilizers = StabilizerBank(window=5)  # One vote per hand; short, landmarks are smoothed
+    landmarks = LandmarkBuffer(max_hands=2)
+    tracker = HandTracker()  # Stable hand ids across frames
+    smoothing = LandmarkFilterBank(max_hands=2, enabled=not args.no_smoothing)
+    gestures = GestureTable()
+    compositor = Compositor(alpha=0.7)  # Reuses its buffers every frame
+    events = open_events(args)  # Gesture changes/landmarks for other programs
+    recorder = open_session(args)  # Saves what is shown, off the render thread
+    for rule in args.gesture:
+        gestures.register(*parse_rule(rule))
     
-    # Other fingers
-    for tip in [8, 12, 16, 20]:
-        if tip-2 >= len(lmList):
-            fingers.append(False)
-            continue
-        fingers.append(lmList[tip][1] < lmList[tip-2][1])
+    def process(img):
+        return detector.findHands(img, draw=True)
     
-    return fingers
+    def render(frame, result):
+        hands, img = result
+        profiler = pipeline.profiler
 
-def detect_gesture(finger_states, lmList):
-    # I Love You 🤟 (Thumb + Index + Pinky up)
-    if (finger_states[0] and   # Thumb
-        finger_states[1] and   # Index
-        not finger_states[2] and  # Middle
-        not finger_states[3] and  # Ring
-        finger_states[4]):     # Pinky
-        return 'I Love You 🤟'
-    
-    # Metal Horns 🤘 (Index + Pinky up)
-    if finger_states[1] and finger_states[4] and not any(finger_states[2:4]):
-        return 'Metal Horns 🤘'
-    
-    # Phone 🤙 (Thumb + Pinky up)
-    if finger_states[0] and finger_states[4] and not any(finger_states[1:4]):
-        return 'Phone 🤙'
-    
-    # Spidey Web 🕷️ (Middle + Ring down)
-    if finger_states[1] and not finger_states[2] and not finger_states[3] and finger_states[4]:
-        return 'Spidey 🕷️'
-    
-    # Gun 🔫 (Index up + thumb up)
-    if finger_states[0] and finger_states[1] and not any(finger_states[2:]):
-        return 'Gun 🔫'
-    
-    # Thumbs Up/Down 👍👎
-    if sum(finger_states[1:]) == 0:
-        return 'Thumbs Up 👍' if finger_states[0] else 'Thumbs Down 👎'
-    
-    # Mood 😈 (Middle finger only)
-    if finger_states[2] and not any([finger_states[1], finger_states[3], finger_states[4]]):
-        return 'Mood 😈'
-    
-    return 'Unknown'
-
-def main():
-    cap = cv2.VideoCapture(0)
-    cap.set(3, CAM_WIDTH)
-    cap.set(4, CAM_HEIGHT)
-    
-    detector = HandDetector(maxHands=2, detectionCon=0.9)
-    gesture_history = deque(maxlen=15)
-    
-    while True:
-        success, img = cap.read()
-        if not success:
-            print("Failed to capture frame")
-            time.sleep(0.1)
-            continue
-            
-        img = cv2.flip(img, 1)
-        hands, img = detector.findHands(img, draw=True)
-        effect_img = img.copy()
+        with profiler.measure(frame.index, "classify"):
+            lms, is_right = landmarks.load(hands)
+            track_ids = tracker.update(landmarks.hands).tolist()
+            for track_id in tracker.ended:
+                stabilizers.discard(track_id)
+            smoothing.filter(track_ids, lms, frame.timestamp)
+            labels = gestures.classify_batch(finger_states(lms, is_right))
+            stable_gestures = [stabilizers.update(track_id, gesture, hand.get("score", 1.0))
+                               for track_id, gesture, hand in zip(track_ids, labels,
+                                                                  landmarks.hands)]
+            events.update(frame, track_ids, stable_gestures, lms,
+                          [hand["type"] for hand in landmarks.hands])
+            if any(gesture != 'Unknown' for gesture in stable_gestures):
+                startup.mark("first_gesture")
 
-        try:
-            if hands:
-                for hand in hands:
-                    if not all(key in hand for key in ["lmList", "bbox", "type"]):
-                        continue
-                        
-                    lmList = hand["lmList"]
-                    bbox = hand["bbox"]
-                    hand_type = hand["type"]
-                    
-                    if len(lmList) < 21:
-                        continue
-                    
-                    # Convert to 2D points
-                    lmList_2d = [[point[0], point[1]] for point in lmList]
-                    
-                    finger_states = count_fingers(lmList, hand_type)
-                    gesture = detect_gesture(finger_states, lmList)
-                    gesture_history.append(gesture)
-                    
-                    # I Love You Effect
-                    if gesture == 'I Love You 🤟':
-                        # Draw heart between thumb and pinky
-                        pt1 = (int(lmList_2d[4][0]), int(lmList_2d[4][1]))
-                        pt2 = (int(lmList_2d[20][0]), int(lmList_2d[20][1]))
-                        cv2.line(effect_img, pt1, pt2, (255,0,255), 3)
-                        cv2.putText(effect_img, "❤️", (bbox[0]-50, bbox[1]-100),
-                                cv2.FONT_HERSHEY_SIMPLEX, 2, (255,0,255), 3)
-                    
-                    # ... (keep other effects the same) ...
+        with profiler.measure(frame.index, "effects"):
+            compositor.begin(img)
+            for hand, lmList, gesture in zip(landmarks.hands, lms, labels):
+                bbox = hand["bbox"]
+                
+                # I Love You Effect
+                if gesture == 'I Love You 🤟':
+                    # Draw heart between thumb and pinky
+                    pt1 = (int(lmList[4][0]), int(lmList[4][1]))
+                    pt2 = (int(lmList[20][0]), int(lmList[20][1]))
+                    compositor.line(pt1, pt2, (255,0,255), 3)
+                    compositor.putText("❤️", (bbox[0]-50, bbox[1]-100),
+                            cv2.FONT_HERSHEY_SIMPLEX, 2, (255,0,255), 3)
+                
+                # ... (keep other effects the same) ...
 
-            # Blend effects
-            alpha = 0.7
-            img = cv2.addWeighted(img, 1-alpha, effect_img, alpha, 0)
-            
-            # Get stable gesture
-            stable_gesture = max(set(gesture_history), 
-                            key=lambda x: list(gesture_history).count(x)) if gesture_history else 'Unknown'
-            
-            cv2.putText(img, stable_gesture, 
-                    (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 3, 
-                    GESTURE_COLORS.get(stable_gesture, (255,255,255)), 5)
-            
-            cv2.imshow("Gesture Control", img)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        with profiler.measure(frame.index, "blend"):
+            # Blend effects (only the areas they touched)
+            img = compositor.end()
+        
+            # Draw one stable gesture per visible hand
+            for row, stable_gesture in enumerate(stable_gestures or ['Unknown']):
+                compositor.label(img, stable_gesture, 
+                        (50, 100 + 100*row), cv2.FONT_HERSHEY_SIMPLEX, 3, 
+                        GESTURE_COLORS.get(stable_gesture, (255,255,255)), 5)
+            recorder.write(frame, img, stable_gestures)
 
-        except Exception as e:
-            print(f"Error: {e}")
-            continue
+        return img
 
-    cap.release()
-    cv2.destroyAllWindows()
+    pipeline = Pipeline(source, process, render, window="Gesture Control", flip=True,
+                        **pipeline_options(args))
+    pipeline.run()
+    print_detector_stats(detector)
+    recorder.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import warnings
+
+import numpy as np
+
+# Finger order used by patterns and masks: thumb, index, middle, ring, pinky.
+# Bit i of a mask is finger i, so a mask is an index into a 32-entry table.
+MASK_WEIGHTS = 1 << np.arange(5)
+UNKNOWN = 'Unknown'
+
+# ===== Rule sets =====
+# One character per finger: '1' up, '0' down, '.' either.
+# Earlier rules win where patterns overlap.
+DEFAULT_RULES = [
+    ('I Love You 🤟', '11001'),
+    ('Metal Horns 🤘', '.1001'),
+    ('Phone 🤙', '10001'),
+    ('Gun 🔫', '11000'),
+    ('Thumbs Up 👍', '10000'),
+    ('Thumbs Down 👎', '00000'),
+    ('Mood 😈', '.0100'),
+    ('Paper 🖐️', '11111'),
+    ('Scissors ✌️', '01100'),
+]
+
+RPS_RULES = [
+    ('Rock ✊', '00000'),
+    ('Paper 🖐️', '11111'),
+    ('Scissors ✌️', '01100'),
+]
+RULE_SETS = {'default': DEFAULT_RULES, 'rps': RPS_RULES}
+# =====================
+
+
+def parse_pattern(pattern):
+    # '1.001' -> (care bits, value bits)
+    if len(pattern) != 5 or set(pattern) - set('01.'):
+        raise ValueError(f"Gesture pattern must be 5 of '0', '1', '.': {pattern!r}")
+    care = sum(1 << i for i, c in enumerate(pattern) if c != '.')
+    value = sum(1 << i for i, c in enumerate(pattern) if c == '1')
+    return care, value
+
+
+def parse_rule(text):
+    # 'Name=.1001' as given on the command line
+    name, sep, pattern = text.rpartition('=')
+    if not sep or not name:
+        raise ValueError(f"Expected NAME=PATTERN, got {text!r}")
+    parse_pattern(pattern)
+    return name, pattern
+
+
+def pack_states(finger_states):
+    """Finger states (..., 5) -> 5-bit masks (...)."""
+    return np.asarray(finger_states, bool) @ MASK_WEIGHTS
+
+
+class GestureTable:
+    """Maps every 5-bit finger mask to a gesture label.
+
+    The table is rebuilt from the rule list whenever it changes, so
+    classification is a single index. Overlaps are recorded in
+    ``conflicts`` as (mask, winner, shadowed) and a warning is raised for
+    any rule that can never fire. ``register`` also warns when the new rule
+    overlaps existing ones.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, default=UNKNOWN):
+        self.default = default
+        self.rules = []
+        for name, pattern in rules:
+            parse_pattern(pattern)
+            self.rules.append((name, pattern))
+        self.build()
+
+    def register(self, name, pattern, first=True):
+        # User gestures take precedence over the built-in ones unless first=False
+        parse_pattern(pattern)
+        rule = (name, pattern)
+        if first:
+            self.rules.insert(0, rule)
+        else:
+            self.rules.append(rule)
+        self.build()
+        overlaps = sorted({shadowed if winner == name else winner
+                           for _, winner, shadowed in self.conflicts
+                           if name in (winner, shadowed)} - {name})
+        if overlaps:
+            warnings.warn(f"Gesture {name!r} ({pattern}) overlaps {', '.join(overlaps)}; "
+                          f"{'it wins' if first else 'they win'} where both match", stacklevel=2)
+
+    def build(self):
+        table = [None] * 32
+        self.conflicts = []
+        parsed = [(name, parse_pattern(pattern)) for name, pattern in self.rules]
+        for mask in range(32):
+            for name, (care, value) in parsed:
+                if mask & care != value:
+                    continue
+                if table[mask] is None:
+                    table[mask] = name
+                elif table[mask] != name:
+                    self.conflicts.append((mask, table[mask], name))
+
+        reachable = set(table)
+        for name, pattern in self.rules:
+            if name not in reachable:
+                winners = sorted({w for m, w, s in self.conflicts if s == name})
+                warnings.warn(f"Gesture {name!r} ({pattern}) can never fire: "
+                              f"shadowed by {', '.join(winners)}")
+
+        self.table = tuple(self.default if label is None else label for label in table)
+
+    def classify(self, finger_states):
+        mask = 0
+        for i, up in enumerate(finger_states):
+            if up:
+                mask |= 1 << i
+        return self.table[mask]
+
+    def classify_batch(self, finger_states):
+        """(n_hands, 5) bool array -> list of n_hands labels."""
+        return [self.table[mask] for mask in pack_states(finger_states)]
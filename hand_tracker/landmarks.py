@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+
+# ===== Landmark layout (MediaPipe hand model) =====
+NUM_LANDMARKS = 21
+WRIST = 0
+THUMB_TIP, THUMB_IP = 4, 3
+FINGER_TIPS = np.array([8, 12, 16, 20])   # Index, middle, ring, pinky
+FINGER_PIPS = FINGER_TIPS - 2
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),          # Thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),          # Index
+    (5, 9), (9, 10), (10, 11), (11, 12),     # Middle
+    (9, 13), (13, 14), (14, 15), (15, 16),   # Ring
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # Pinky and palm
+)
+# ==================================================
+
+
+class LandmarkBuffer:
+    """The hands of one frame packed into a single (n_hands, 21, 3) float32 array.
+
+    The backing storage is allocated once and reused every frame; ``load``
+    returns views into it, so copy anything that has to outlive the frame.
+    """
+
+    def __init__(self, max_hands=2):
+        self.max_hands = max_hands
+        self._landmarks = np.zeros((max_hands, NUM_LANDMARKS, 3), np.float32)
+        self._is_right = np.zeros(max_hands, bool)
+        self.hands = []   # The hand dicts backing each row
+        self.count = 0
+
+    def load(self, hands):
+        self.hands.clear()
+        for hand in hands or ():
+            if len(self.hands) == self.max_hands:
+                break
+            if not all(key in hand for key in ("lmList", "bbox", "type")):
+                continue
+            lmList = hand["lmList"]
+            if lmList is None or len(lmList) < NUM_LANDMARKS:
+                continue
+            n = len(self.hands)
+            self._landmarks[n] = np.asarray(lmList, np.float32)[:NUM_LANDMARKS, :3]
+            self._is_right[n] = hand["type"] == "Right"
+            self.hands.append(hand)
+        self.count = len(self.hands)
+        return self.landmarks, self.is_right
+
+    @property
+    def landmarks(self):
+        return self._landmarks[:self.count]
+
+    @property
+    def is_right(self):
+        return self._is_right[:self.count]
+
+
+def finger_states(landmarks, is_right):
+    """Up/down state of [thumb, index, middle, ring, pinky] for every hand.
+
+    ``landmarks`` is (n_hands, 21, 3), ``is_right`` is a bool or an (n_hands,)
+    bool array. Returns an (n_hands, 5) bool array.
+    """
+    states = np.empty((landmarks.shape[0], 5), bool)
+    thumb_x, ip_x = landmarks[:, THUMB_TIP, 0], landmarks[:, THUMB_IP, 0]
+    states[:, 0] = np.where(is_right, thumb_x > ip_x, thumb_x < ip_x)
+    states[:, 1:] = landmarks[:, FINGER_TIPS, 1] < landmarks[:, FINGER_PIPS, 1]
+    return states
+
+
+def count_fingers(landmarks, is_right):
+    return finger_states(landmarks, is_right).sum(axis=1)
+
+
+def distances(landmarks, a, b):
+    """2D pixel distance between landmarks ``a`` and ``b`` (ints or index arrays)."""
+    delta = landmarks[:, a, :2] - landmarks[:, b, :2]
+    return np.sqrt((delta * delta).sum(axis=-1))
+
+
+def angles(landmarks, a, b, c):
+    """Angle in degrees at joint ``b`` formed by ``a``-``b``-``c``, for every hand."""
+    v1 = landmarks[:, a, :2] - landmarks[:, b, :2]
+    v2 = landmarks[:, c, :2] - landmarks[:, b, :2]
+    dot = (v1 * v2).sum(axis=-1)
+    norm = np.sqrt((v1 * v1).sum(axis=-1) * (v2 * v2).sum(axis=-1))
+    return np.degrees(np.arccos(np.clip(dot / np.maximum(norm, 1e-6), -1.0, 1.0)))
+
+
+def draw_hands(img, hands):
+    # Same overlay as cvzone's findHands(draw=True), for hands found on another image
+    for hand in hands:
+        points = [(int(p[0]), int(p[1])) for p in hand["lmList"]]
+        for a, b in HAND_CONNECTIONS:
+            cv2.line(img, points[a], points[b], (224, 224, 224), 2)
+        for point in points:
+            cv2.circle(img, point, 3, (0, 0, 255), cv2.FILLED)
+        x, y, w, h = (int(v) for v in hand["bbox"])
+        cv2.rectangle(img, (x-20, y-20), (x+w+20, y+h+20), (255, 0, 255), 2)
+        cv2.putText(img, hand["type"], (x-30, y-30), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 255), 2)
+    return img
@@ -0,0 +1,198 @@
+import math
+
+import numpy as np
+
+from landmarks import THUMB_TIP, WRIST
+
+# ===== Configuration =====
+WINDOW = 24            # Frames of trajectory kept per hand (~0.8 s at 30 FPS)
+MIN_POINTS = 8         # Frames needed before anything is recognized
+DIRECTION_BINS = 8
+INDEX_TIP, MIDDLE_MCP = 8, 9
+# Distances below are in palm lengths (wrist to middle knuckle)
+JITTER = 0.05          # Steps shorter than this don't count as a direction
+SWIPE_DISTANCE = 2.5
+SWIPE_STRAIGHTNESS = 0.8
+CIRCLE_TURN = 1.6 * math.pi
+CIRCLE_MIN_PATH = 3.0
+WAVE_REVERSALS = 3
+WAVE_MIN_PATH = 2.0
+PINCH_RATIO = 0.35     # Thumb-index tip distance that counts as pinched
+PINCH_DRAG_DISTANCE = 1.5
+# =========================
+
+SWIPES = ("Swipe Right", "Swipe Down", "Swipe Left", "Swipe Up")   # Image axes: y points down
+
+
+class MotionBuffer:
+    """Wrist trajectory of one hand in fixed-size NumPy rings, with running features.
+
+    Every step, turn and direction-histogram contribution is stored on the
+    slot of the point whose departure removes it from the window, so each
+    ``push`` adds the newest contributions and subtracts the oldest ones in
+    O(1): path length, net displacement and speed, total signed turning,
+    horizontal direction reversals, a length-weighted direction histogram
+    and how many frames were pinched.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.points = np.zeros((window, 2))    # Wrist
+        self.tips = np.zeros((window, 2))      # Midpoint of thumb and index tips
+        self.times = np.zeros(window)
+        self.pinched = np.zeros(window, bool)
+        # Contributions owned by each slot, removed when its point leaves
+        self.own_step = np.zeros(window)
+        self.own_bin = np.full(window, -1, np.int8)
+        self.own_turn = np.zeros(window)
+        self.own_reversal = np.zeros(window, bool)
+
+        self.histogram = np.zeros(DIRECTION_BINS)
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.head = 0          # Slot the next point goes into
+        self.path = 0.0
+        self.turning = 0.0
+        self.reversals = 0
+        self.pinch_count = 0
+        self.scale = 1.0
+        self.histogram[:] = 0
+        # Drop the slots' contributions too, or they are subtracted again once the ring refills
+        self.own_step[:] = 0.0
+        self.own_turn[:] = 0.0
+        self.own_bin[:] = -1
+        self.own_reversal[:] = False
+        self.pinched[:] = False
+        self._step = None      # Last significant step (dx, dy), its slot owner
+        self._dx_sign = 0
+        self._last = None      # Newest point as Python floats
+
+    def _slot(self, back):
+        # Slot of the point ``back`` pushes ago (0 = newest)
+        return (self.head - 1 - back) % self.window
+
+    def _retire(self, slot):
+        self.path -= self.own_step[slot]
+        direction = self.own_bin[slot]
+        if direction >= 0:
+            self.histogram[direction] -= self.own_step[slot]
+        self.turning -= self.own_turn[slot]
+        self.reversals -= int(self.own_reversal[slot])
+        self.pinch_count -= int(self.pinched[slot])
+        self.own_step[slot] = self.own_turn[slot] = 0.0
+        self.own_bin[slot] = -1
+        self.own_reversal[slot] = False
+        if self._step is not None and self._step[1] == slot:
+            self._step = None
+
+    def push(self, x, y, tip_x, tip_y, timestamp, scale, pinched):
+        slot = self.head
+        if self.count == self.window:
+            self._retire(slot)
+        else:
+            self.count += 1
+        self.scale = max(scale, 1e-6)
+
+        if self.count > 1:
+            prev = self._slot(0)
+            dx, dy = x - self._last[0], y - self._last[1]
+            length = math.hypot(dx, dy)
+            self.own_step[prev] = length
+            self.path += length
+            if length > JITTER * self.scale:
+                direction = int(round(math.atan2(dy, dx) / (2 * math.pi / DIRECTION_BINS))) \
+                    % DIRECTION_BINS
+                self.own_bin[prev] = direction
+                self.histogram[direction] += length
+                if self._step is not None:
+                    # Turn between the previous significant step and this one, owned by
+                    # that step's start so it leaves with it
+                    (px, py), owner = self._step
+                    turn = math.atan2(px * dy - py * dx, px * dx + py * dy)
+                    self.own_turn[owner] += turn
+                    self.turning += turn
+                    sign = (dx > 0) - (dx < 0)
+                    if abs(dx) > abs(dy) and sign and self._dx_sign and sign != self._dx_sign:
+                        self.own_reversal[owner] = True
+                        self.reversals += 1
+                    if abs(dx) > abs(dy) and sign:
+                        self._dx_sign = sign
+                elif abs(dx) > abs(dy):
+                    self._dx_sign = (dx > 0) - (dx < 0)
+                self._step = ((dx, dy), prev)
+
+        self.points[slot] = self._last = x, y
+        self.tips[slot] = tip_x, tip_y
+        self.times[slot] = timestamp
+        self.pinched[slot] = pinched
+        self.pinch_count += int(pinched)
+        self.head = (slot + 1) % self.window
+
+    def features(self):
+        """Current features; distances are in palm lengths, speeds per second."""
+        newest, oldest = self._slot(0), self._slot(self.count - 1)
+        net = (self.points[newest] - self.points[oldest]) / self.scale
+        duration = max(self.times[newest] - self.times[oldest], 1e-6)
+        path = self.path / self.scale
+        total = self.histogram.sum()
+        return {"path": path, "net": net, "velocity": net / duration,
+                "speed": path / duration,
+                "straightness": math.hypot(*net) / path if path else 0.0,
+                "turning": self.turning, "reversals": self.reversals,
+                "histogram": self.histogram / total if total else self.histogram.copy(),
+                "pinch": self.pinch_count / self.count if self.count else 0.0}
+
+    def recognize(self):
+        """Motion gesture completed by the latest push, or None."""
+        if self.count < MIN_POINTS:
+            return None
+        newest, oldest = self._slot(0), self._slot(self.count - 1)
+        nx = (self.points[newest, 0] - self.points[oldest, 0]) / self.scale
+        ny = (self.points[newest, 1] - self.points[oldest, 1]) / self.scale
+        net = math.hypot(nx, ny)
+        path = self.path / self.scale
+
+        label = None
+        drag = math.hypot(*(self.tips[newest] - self.tips[oldest])) / self.scale
+        if self.pinch_count == self.count and drag > PINCH_DRAG_DISTANCE:
+            label = "Pinch Drag"
+        elif abs(self.turning) > CIRCLE_TURN and path > CIRCLE_MIN_PATH and net < 0.5 * path:
+            label = "Circle CW" if self.turning > 0 else "Circle CCW"   # y points down
+        elif self.reversals >= WAVE_REVERSALS and path > WAVE_MIN_PATH:
+            horizontal = self.histogram[0] + self.histogram[DIRECTION_BINS // 2]
+            if horizontal > 0.5 * self.histogram.sum():
+                label = "Wave"
+        elif net > SWIPE_DISTANCE and net > SWIPE_STRAIGHTNESS * path:
+            label = SWIPES[int(round(math.atan2(ny, nx) / (math.pi / 2))) % 4]
+        if label is not None:
+            self.clear()   # Each motion fires once
+        return label
+
+
+class MotionBank:
+    """One MotionBuffer per hand key (track id)."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._buffers = {}
+
+    def update(self, key, landmarks, timestamp):
+        """Push one hand's (21, 3) landmarks; returns a motion gesture or None."""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = MotionBuffer(self.window)
+        wx, wy = float(landmarks[WRIST, 0]), float(landmarks[WRIST, 1])
+        scale = math.hypot(float(landmarks[MIDDLE_MCP, 0]) - wx, float(landmarks[MIDDLE_MCP, 1]) - wy)
+        tx, ty = float(landmarks[THUMB_TIP, 0]), float(landmarks[THUMB_TIP, 1])
+        ix, iy = float(landmarks[INDEX_TIP, 0]), float(landmarks[INDEX_TIP, 1])
+        pinched = math.hypot(tx - ix, ty - iy) < PINCH_RATIO * scale
+        buffer.push(wx, wy, (tx + ix) / 2, (ty + iy) / 2, timestamp, scale, pinched)
+        return buffer.recognize()
+
+    def __getitem__(self, key):
+        return self._buffers[key]
+
+    def discard(self, key):
+        self._buffers.pop(key, None)
@@ -0,0 +1,268 @@
+import argparse
+import os
+import queue
+import threading
+import time
+
+import cv2
+from detection import add_detector_args, detector_stats, hand_detector, wrap_detector
+from gestures import RULE_SETS, GestureTable
+from landmarks import LandmarkBuffer, finger_states
+from pipeline import DropQueue, open_source
+from stabilizer import StabilizerBank
+
+# ===== Configuration =====
+CAM_WIDTH = 1280
+CAM_HEIGHT = 720
+HISTORY_LENGTH = 15  # Frames for gesture stabilization, per stream
+# =========================
+
+_END = object()  # Pushed by a capture thread when its source is exhausted
+
+
+class PoolDetector:
+    """Routes findHands to the detector owned by the calling worker thread.
+
+    Every stream wraps this in its own detector chain (ROI tracking, scaling),
+    so per-stream state stays with the stream while the models are shared.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def detector(self):
+        return self._local.detector
+
+    @detector.setter
+    def detector(self, detector):
+        self._local.detector = detector
+
+    def findHands(self, img, draw=True, flipType=True):
+        return self._local.detector.findHands(img, draw=draw, flipType=flipType)
+
+
+class Stream:
+    """One source with its own capture thread, detector chain and gesture state."""
+
+    def __init__(self, index, spec, source, detector, gestures, max_hands=2, stop_event=None):
+        self.index = index
+        self.name = f"{index}: {spec if spec is not None else 0}"
+        self.source = source
+        self.detector = detector
+        self.gestures = gestures
+        self.queue = DropQueue(1, getattr(source, "live", True), stop_event)
+        self.landmarks = LandmarkBuffer(max_hands)
+        self.stabilizers = StabilizerBank(window=HISTORY_LENGTH)
+        self.busy = False   # A worker holds this stream, so its frames stay in order
+        self.done = False
+        self.processed = 0
+        self.fps = 0.0
+        self.started = None
+        self.finished = None
+        self._last = None
+
+    def classify(self, hands):
+        lms, is_right = self.landmarks.load(hands)
+        labels = self.gestures.classify_batch(finger_states(lms, is_right))
+        return [self.stabilizers.update(hand["type"], label, hand.get("score", 1.0))
+                for hand, label in zip(self.landmarks.hands, labels)]
+
+    def tick(self):
+        now = time.perf_counter()
+        if self._last is None:
+            self.started = now
+        else:
+            self.fps = 0.9 * self.fps + 0.1 / max(now - self._last, 1e-6)
+        self._last = self.finished = now
+        self.processed += 1
+
+    def summary(self):
+        elapsed = (self.finished or 0) - (self.started or 0)
+        return {"stream": self.name, "frames": self.processed,
+                "fps": round((self.processed - 1) / elapsed, 1) if elapsed > 0 else 0.0,
+                "dropped": self.queue.dropped, **detector_stats(self.detector)}
+
+
+class MultiStreamServer:
+    """N capture sources served by a shared pool of detector worker threads.
+
+    Workers pick streams round-robin and take each stream's freshest frame,
+    so a busy camera can't starve the others. A stream is handed to one
+    worker at a time, which keeps its frames and gesture state in order;
+    parallelism comes from serving different streams at once. Results are
+    drawn and shown on the calling thread, one window per stream.
+    """
+
+    def __init__(self, sources, make_detector, wrap, gestures, workers=None,
+                 headless=False, max_frames=None, flip=False, max_hands=2):
+        self._stop = threading.Event()
+        self._ready = threading.Condition()
+        self.pool = PoolDetector()
+        self.streams = [Stream(i, spec, source, wrap(self.pool), gestures, max_hands, self._stop)
+                        for i, (spec, source) in enumerate(sources)]
+        self.make_detector = make_detector
+        self.workers = workers or min(len(self.streams), os.cpu_count() or 1)
+        self.headless = headless
+        self.max_frames = max_frames
+        self.flip = flip
+        live = all(getattr(s.source, "live", True) for s in self.streams)
+        self.results = DropQueue(2 * len(self.streams), live, self._stop)
+        self._cursor = 0
+        self._error = None
+
+    def _capture_loop(self, stream):
+        count = 0
+        try:
+            while not self._stop.is_set() and (not self.max_frames or count < self.max_frames):
+                success, img = stream.source.read()
+                if not success:
+                    if getattr(stream.source, "live", True):
+                        time.sleep(0.1)
+                        continue
+                    break
+                stream.queue.put(img)
+                count += 1
+                with self._ready:
+                    self._ready.notify()
+        except Exception as e:
+            self._error = e
+        stream.queue.put(_END)
+        with self._ready:
+            self._ready.notify()
+
+    def _next_job(self):
+        n = len(self.streams)
+        with self._ready:
+            while not self._stop.is_set():
+                if all(stream.done for stream in self.streams):
+                    return None, None
+                for offset in range(n):
+                    stream = self.streams[(self._cursor + offset) % n]
+                    if stream.busy or stream.done:
+                        continue
+                    try:
+                        item = stream.queue.get(timeout=0)
+                    except queue.Empty:
+                        continue
+                    self._cursor = (stream.index + 1) % n
+                    if item is _END:
+                        stream.done = True
+                    else:
+                        stream.busy = True
+                    return stream, item
+                self._ready.wait(0.1)
+        return None, None
+
+    def _worker_loop(self):
+        try:
+            self.pool.detector = self.make_detector()
+            while True:
+                stream, item = self._next_job()
+                if stream is None:
+                    break
+                if item is _END:
+                    self.results.put((stream, None, None))
+                    continue
+                try:
+                    img = cv2.flip(item, 1) if self.flip else item
+                    hands, img = stream.detector.findHands(img, draw=True)
+                    labels = stream.classify(hands)
+                    stream.tick()
+                    self.results.put((stream, img, labels))
+                finally:
+                    with self._ready:
+                        stream.busy = False
+                        self._ready.notify()
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+
+    def _render(self, stream, img, labels):
+        cv2.putText(img, f"Stream {stream.name}  FPS: {int(stream.fps)}", (20, 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
+        for row, label in enumerate(labels or ['Unknown']):
+            cv2.putText(img, label, (20, 100 + 60*row), cv2.FONT_HERSHEY_SIMPLEX, 1.5,
+                        (255, 255, 255), 3)
+        cv2.imshow(f"Stream {stream.name}", img)
+
+    def run(self):
+        threads = [threading.Thread(target=self._capture_loop, args=(stream,), daemon=True)
+                   for stream in self.streams]
+        threads += [threading.Thread(target=self._worker_loop, daemon=True)
+                    for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+
+        ended = 0
+        try:
+            while ended < len(self.streams) and not self._stop.is_set():
+                try:
+                    stream, img, labels = self.results.get()
+                except queue.Empty:
+                    continue
+                if img is None:
+                    ended += 1
+                    continue
+                if not self.headless:
+                    self._render(stream, img, labels)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join(timeout=1.0)
+            for stream in self.streams:
+                stream.source.release()
+            if not self.headless:
+                cv2.destroyAllWindows()
+
+        if self._error is not None:
+            raise self._error
+
+    def summary(self):
+        return [stream.summary() for stream in self.streams]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve several cameras or video files from one shared pool of hand detectors")
+    parser.add_argument("sources", nargs="+",
+                        help="camera indexes, video files or 'synthetic[:N]', one per stream")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="detector worker threads (default: one per stream, up to the core count)")
+    parser.add_argument("--rules", choices=sorted(RULE_SETS), default='default',
+                        help="gesture rule set")
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--detection-con", type=float, default=0.8)
+    parser.add_argument("--flip", action="store_true", help="mirror frames like the live apps do")
+    parser.add_argument("--headless", action="store_true", help="don't open any windows")
+    parser.add_argument("--max-frames", type=int, default=None,
+                        help="stop each stream after this many frames")
+    add_detector_args(parser)
+    args = parser.parse_args(argv)
+
+    sources = [(spec, open_source(spec, CAM_WIDTH, CAM_HEIGHT)) for spec in args.sources]
+    # Static mode: a worker's model sees frames from many streams, so
+    # MediaPipe's frame-to-frame tracking would mix them up
+    server = MultiStreamServer(
+        sources,
+        lambda: hand_detector(True, maxHands=args.max_hands, detectionCon=args.detection_con),
+        lambda pool: wrap_detector(pool, args),
+        GestureTable(RULE_SETS[args.rules]),
+        workers=args.workers, headless=args.headless, max_frames=args.max_frames,
+        flip=args.flip, max_hands=args.max_hands)
+    start = time.perf_counter()
+    server.run()
+    elapsed = time.perf_counter() - start
+
+    total = 0
+    for stats in server.summary():
+        total += stats["frames"]
+        print(", ".join(f"{key}={value}" for key, value in stats.items()))
+    print(f"{len(server.streams)} streams, {server.workers} workers: "
+          f"{total} frames in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.1f} FPS total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,479 @@
+import argparse
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import cv2
+import numpy as np
+
+from detection import add_detector_args, load_detector
+from events import add_event_args
+from process_detector import ProcessDetector
+from profiler import StageProfiler
+from recording import (LandmarkRecording, RecordingDetector, ReplayDetector, ReplaySource,
+                       add_recording_args)
+from session import add_session_args
+from smoothing import add_smoothing_args
+from soak import add_soak_args, open_soak
+from startup import startup
+
+# A captured frame travelling through the pipeline. ``timestamp`` is its capture time
+# (recorded time for replays); ``arrived`` is the perf_counter time it entered the
+# pipeline, which latency is measured from
+Frame = namedtuple("Frame", ["index", "timestamp", "image", "arrived"])
+
+_END = object()  # Sentinel pushed downstream when the source is exhausted
+_inferring = threading.local()   # Frame each inference thread is working on
+
+
+def capture_time():
+    # Capture time of the frame the calling inference thread is detecting; now elsewhere
+    frame = getattr(_inferring, "frame", None)
+    return time.perf_counter() if frame is None else frame.timestamp
+
+
+class DropQueue:
+    """Bounded queue between two stages.
+
+    With ``drop=True`` a full queue discards its oldest item so the producer
+    never waits and the consumer always gets the freshest frame. With
+    ``drop=False`` the producer blocks instead (used for file sources where
+    every frame matters).
+    """
+
+    def __init__(self, maxsize=1, drop=True, stop_event=None):
+        self._queue = queue.Queue(maxsize)
+        self.drop = drop
+        self.dropped = 0
+        self._stop = stop_event or threading.Event()
+
+    def put(self, item):
+        if self.drop:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self, timeout=0.1):
+        return self._queue.get(timeout=timeout)
+
+
+# ===== Frame sources =====
+# Modes UVC cameras commonly offer; requested sizes snap to the nearest one
+STANDARD_MODES = ((1920, 1080), (1280, 720), (1024, 576), (960, 540), (848, 480),
+                  (640, 480), (640, 360), (320, 240))
+FOURCCS = ("MJPG", "YUYV")   # Tried in order; MJPG allows high resolutions at full FPS
+DRAIN_MAX = 4                # Stale frames discarded per read at most
+
+
+def standard_mode(width, height):
+    # Closest standard mode by aspect ratio, then by size
+    return min(STANDARD_MODES, key=lambda mode: (round(abs(mode[0] / mode[1] - width / height), 2),
+                                                  abs(mode[0] * mode[1] - width * height)))
+
+
+def _fourcc_name(code):
+    code = int(code)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\0") or "?"
+
+
+class CameraSource:
+    """A camera that hands out its newest frame rather than the oldest buffered one.
+
+    The pixel format (MJPG, else YUYV), a standard resolution and ``fps``
+    are negotiated and the mode actually granted is printed. The driver
+    queue is set to one frame; where that isn't honoured, ``read`` drains
+    stale frames: a ``grab`` that returns much sooner than a frame period
+    came from the queue, so it is replaced by the next one, up to
+    ``DRAIN_MAX`` times. ``timestamp`` is the ``time.perf_counter()`` at
+    which the last frame read was grabbed. ``cap`` replaces the camera with
+    any ``cv2.VideoCapture`` (e.g. a file) for testing.
+    """
+
+    live = True
+
+    def __init__(self, index=0, width=None, height=None, fps=None, fourcc=None, cap=None):
+        self.cap = cap if cap is not None else cv2.VideoCapture(index)
+        if width and height:
+            width, height = standard_mode(width, height)
+        for code in ([fourcc] if fourcc else FOURCCS):
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*code))
+            if width:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            if height:
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            if _fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC)) == code:
+                break
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.buffered = not self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or fps or 30.0
+        self.drained = 0       # Stale frames discarded
+        self.timestamp = None
+        print(f"Camera {index}: {int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
+              f"{int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+              f"{_fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC))} @ {self.fps:g} fps"
+              f"{', draining stale frames' if self.buffered else ''}")
+
+    def read(self):
+        start = time.perf_counter()
+        if not self.cap.grab():
+            return False, None
+        grabbed = time.perf_counter()
+        if self.buffered:
+            # A grab that returns well within a period got a frame that was already waiting
+            for _ in range(DRAIN_MAX):
+                if grabbed - start > 0.5 / self.fps or not self.cap.grab():
+                    break
+                start, grabbed = grabbed, time.perf_counter()
+                self.drained += 1
+        self.timestamp = grabbed
+        return self.cap.retrieve()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoSource:
+    live = False
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video: {path}")
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource:
+    """Generates frames with a moving blob, for running without a camera."""
+
+    live = False
+
+    def __init__(self, width=1280, height=720, frames=None, fps=None):
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.period = 1.0 / fps if fps else 0
+        self._count = 0
+        self._next = time.perf_counter()
+
+    def read(self):
+        if self.frames is not None and self._count >= self.frames:
+            return False, None
+        if self.period:
+            delay = self._next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next += self.period
+
+        img = np.full((self.height, self.width, 3), 40, np.uint8)
+        phase = self._count * 0.05
+        cx = int(self.width * (0.5 + 0.3 * np.cos(phase)))
+        cy = int(self.height * (0.5 + 0.3 * np.sin(phase)))
+        cv2.circle(img, (cx, cy), self.height // 8, (180, 200, 230), cv2.FILLED)
+        self._count += 1
+        return True, img
+
+    def release(self):
+        pass
+
+
+def open_source(spec=None, width=None, height=None, fps=None, fourcc=None):
+    # None or a number -> camera, "synthetic[:N]" -> generator, anything else -> video file
+    if spec is None or str(spec).isdigit():
+        return CameraSource(int(spec or 0), width, height, fps, fourcc)
+    if str(spec).startswith("synthetic"):
+        _, _, count = str(spec).partition(":")
+        return SyntheticSource(width or 1280, height or 720,
+                               frames=int(count) if count else None)
+    return VideoSource(spec)
+
+
+def open_input(args, width, height, make_detector):
+    # Frame source and wrapped detector for the shared options; --replay stands in for both
+    if args.replay:
+        recording = LandmarkRecording(args.replay)
+        return ReplaySource(recording), ReplayDetector(recording)
+    # The model loads and warms up while the camera opens
+    load = partial(load_detector, make_detector, args, (height or 720, width or 1280, 3))
+    if args.detector_procs > 1:
+        if args.record:
+            raise SystemExit("--record needs frames in order; use it with --detector-procs 1")
+        if args.motion_gate > 0:
+            # In a worker the gate would compare frames N apart and its stats would stay there
+            raise SystemExit("--motion-gate compares consecutive frames; "
+                             "use it with --detector-procs 1")
+        if args.roi_track:
+            # Each worker would crop around hands from frames N apart
+            raise SystemExit("--roi-track follows hands from frame to frame; "
+                             "use it with --detector-procs 1")
+        if args.adaptive_scale:
+            # Each worker would steer its own scale, and the stats would stay in the workers
+            raise SystemExit("--adaptive-scale tunes one detector's scale; "
+                             "use it with --detector-procs 1")
+        # Plain --scale is stateless, so it runs inside each worker next to the model
+        detector = ProcessDetector(load, workers=args.detector_procs)
+        source = open_source(args.source, width, height, args.fps, args.fourcc)
+        startup.mark("source_open")
+    else:
+        with ThreadPoolExecutor(1) as pool:
+            loading = pool.submit(load)
+            source = open_source(args.source, width, height, args.fps, args.fourcc)
+            startup.mark("source_open")
+            detector = loading.result()
+        startup.mark("model_ready")
+    if args.record:
+        detector = RecordingDetector(detector, args.record, clock=capture_time)
+    return source, detector
+# =========================
+
+
+class Pipeline:
+    """Capture -> inference -> render, each stage on its own thread.
+
+    ``process(image)`` runs on the inference worker and returns any result.
+    ``render(frame, result)`` runs on the calling thread (OpenCV windows must
+    live on the main thread) and returns the image to display.
+    ``flip=True`` mirrors each frame before ``process``. Stage timings go to
+    ``self.profiler``; 'p' toggles its HUD. With ``inference_threads`` > 1,
+    ``process`` must be thread-safe; results still reach ``render`` in
+    capture order. A ``monitor`` (see ``soak.SoakMonitor``) sees every
+    rendered frame and is closed when the run ends.
+    """
+
+    def __init__(self, source, process, render, window="Hand Tracking",
+                 headless=False, max_frames=None, queue_size=1, on_key=None,
+                 flip=False, show_hud=False, profile_out=None, inference_threads=1,
+                 monitor=None):
+        self.source = source
+        self.process = process
+        self.render = render
+        self.window = window
+        self.headless = headless
+        self.max_frames = max_frames
+        self.on_key = on_key
+        self.flip = flip
+        self.profile_out = profile_out
+        self.monitor = monitor
+        self.profiler = StageProfiler()
+        self.profiler.show_hud = show_hud
+
+        self._stop = threading.Event()
+        drop = getattr(source, "live", True)
+        self.capture_queue = DropQueue(queue_size, drop, self._stop)
+        self.render_queue = DropQueue(queue_size, drop, self._stop)
+        self._error = None
+        # Several inference threads keep several frames in flight (e.g. for ProcessDetector)
+        self.inference_threads = inference_threads
+        self._take = threading.Lock()
+        self._order = threading.Condition()
+        self._seq = self._emitted = 0
+        self._running = inference_threads
+        self._source_done = False
+        self.frames_rendered = 0
+        self.fps = 0.0
+
+    @property
+    def dropped(self):
+        return self.capture_queue.dropped + self.render_queue.dropped
+
+    def stop(self):
+        self._stop.set()
+
+    def _capture_loop(self):
+        index = 0
+        profiler = self.profiler
+        try:
+            while not self._stop.is_set():
+                profiler.start_frame(index)
+                with profiler.measure(index, "capture"):
+                    success, img = self.source.read()
+                if not success:
+                    if getattr(self.source, "live", True):
+                        print("Failed to capture frame")
+                        time.sleep(0.1)
+                        continue
+                    break
+                if index == 0:
+                    startup.mark("first_frame")
+                # Cameras stamp the moment the frame was grabbed, replays the recorded
+                # capture time; other sources when read
+                arrived = time.perf_counter()
+                timestamp = getattr(self.source, "timestamp", None)
+                if timestamp is None:
+                    timestamp = arrived
+                elif getattr(self.source, "live", True):
+                    arrived = timestamp
+                self.capture_queue.put(Frame(index, timestamp, img, arrived))
+                index += 1
+        except Exception as e:
+            self._error = e
+        self.capture_queue.put(_END)
+
+    def _inference_loop(self):
+        profiler = self.profiler
+        try:
+            while not self._stop.is_set() and not self._source_done:
+                with self._take:
+                    try:
+                        frame = self.capture_queue.get()
+                    except queue.Empty:
+                        continue
+                    if frame is _END:
+                        self._source_done = True
+                        break
+                    seq = self._seq
+                    self._seq += 1
+                img = frame.image
+                start = time.perf_counter()
+                if self.flip:
+                    img = cv2.flip(img, 1)
+                    frame = frame._replace(image=img)
+                    flipped = time.perf_counter()
+                    profiler.record(frame.index, "flip", flipped - start)
+                    start = flipped
+                _inferring.frame = frame
+                try:
+                    result = self.process(img)
+                finally:
+                    _inferring.frame = None
+                if seq == 0:
+                    startup.mark("first_detection")
+                profiler.record(frame.index, "detect", time.perf_counter() - start)
+                # Hand results on in capture order, whichever thread finishes first
+                with self._order:
+                    while self._emitted != seq and not self._stop.is_set():
+                        self._order.wait(0.1)
+                    self.render_queue.put((frame, result))
+                    self._emitted += 1
+                    self._order.notify_all()
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+        finally:
+            with self._order:
+                self._running -= 1
+                last = self._running == 0
+            if last:
+                self.render_queue.put(_END)
+
+    def run(self):
+        threads = [threading.Thread(target=self._capture_loop, daemon=True)]
+        threads += [threading.Thread(target=self._inference_loop, daemon=True)
+                    for _ in range(self.inference_threads)]
+        for t in threads:
+            t.start()
+
+        profiler = self.profiler
+        pTime = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    item = self.render_queue.get()
+                except queue.Empty:
+                    continue
+                if item is _END:
+                    break
+
+                frame, result = item
+                img = self.render(frame, result)
+                if not self.frames_rendered:
+                    startup.mark("first_render")
+                self.frames_rendered += 1
+
+                cTime = time.perf_counter()
+                if self.monitor is not None:
+                    self.monitor.frame(frame, cTime)
+                self.fps = 0.9 * self.fps + 0.1 / max(cTime - pTime, 1e-6)
+                pTime = cTime
+
+                profiler.dropped = self.dropped
+                if not self.headless:
+                    with profiler.measure(frame.index, "display"):
+                        cv2.imshow(self.window, profiler.draw_hud(img))
+                        key = cv2.waitKey(1) & 0xFF
+                    profiler.end_frame(frame.index)
+                    if key == ord('q'):
+                        break
+                    if key == ord('p'):
+                        profiler.show_hud = not profiler.show_hud
+                    elif key != 0xFF and self.on_key:
+                        self.on_key(key)
+                else:
+                    profiler.end_frame(frame.index)
+
+                if self.max_frames and self.frames_rendered >= self.max_frames:
+                    break
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join(timeout=1.0)
+            self.source.release()
+            if not self.headless:
+                cv2.destroyAllWindows()
+            if self.profile_out:
+                self.profiler.dump(self.profile_out)
+            if startup.report not in startup.marks:
+                print(startup.summary())
+            if self.monitor is not None:
+                self.monitor.close()
+
+        if self._error is not None:
+            raise self._error
+        if self.monitor is not None and not self.monitor.passed:
+            raise SystemExit(1)
+
+
+def build_arg_parser(description):
+    # Options shared by every entry point
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--source", default=None,
+                        help="camera index, video file, or 'synthetic[:N]' (default: camera 0)")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="camera frame rate to request")
+    parser.add_argument("--fourcc", choices=FOURCCS, default=None,
+                        help="camera pixel format (default: MJPG, falling back to YUYV)")
+    parser.add_argument("--headless", action="store_true",
+                        help="don't open a window")
+    parser.add_argument("--max-frames", type=int, default=None,
+                        help="stop after this many rendered frames")
+    parser.add_argument("--hud", action="store_true",
+                        help="show the stage latency HUD at start (toggle with 'p')")
+    parser.add_argument("--profile-out", default=None, metavar="PATH",
+                        help="write stage latency stats on exit (.json, or .prom for Prometheus)")
+    parser.add_argument("--detector-procs", type=int, default=1, metavar="N",
+                        help="run the detector in N worker processes fed through shared memory")
+    add_detector_args(parser)
+    add_recording_args(parser)
+    add_event_args(parser)
+    add_smoothing_args(parser)
+    add_session_args(parser)
+    add_soak_args(parser)
+    return parser
+
+
+def pipeline_options(args):
+    # Pipeline keyword arguments from the shared command line options
+    return dict(headless=args.headless, max_frames=args.max_frames,
+                show_hud=args.hud, profile_out=args.profile_out,
+                inference_threads=max(1, args.detector_procs), monitor=open_soak(args))
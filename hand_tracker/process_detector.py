@@ -0,0 +1,192 @@
+import atexit
+import multiprocessing as mp
+import queue
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from detection import find_hands
+from landmarks import NUM_LANDMARKS, draw_hands
+
+
+def _attach(name):
+    # Only the creating process may own (and unlink) the block. Before 3.13,
+    # attaching registers it with the resource tracker too, so suppress that
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class FrameRing:
+    """Fixed slots of frame storage in one shared memory block.
+
+    Frames smaller than the slot shape (e.g. ROI crops) use its top-left corner.
+    """
+
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        size = slots * int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        self.frames = np.ndarray((slots,) + tuple(shape), dtype, buffer=self.shm.buf)
+        self.name = self.shm.name
+
+    def close(self, unlink=False):
+        self.frames = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _pack(hands):
+    # Landmarks as one float32 array; only these small arrays cross the process boundary
+    landmarks = np.array([hand["lmList"][:NUM_LANDMARKS] for hand in hands], np.float32)
+    bboxes = np.array([hand["bbox"] for hand in hands], np.int32).reshape(-1, 4)
+    return (landmarks.reshape(-1, NUM_LANDMARKS, 3), bboxes, [hand["type"] for hand in hands],
+            [hand.get("score", 1.0) for hand in hands])
+
+
+def _unpack(packed):
+    landmarks, bboxes, types, scores = packed
+    hands = []
+    for lm, (x, y, w, h), kind, score in zip(landmarks, bboxes.tolist(), types, scores):
+        hands.append({"lmList": lm.astype(int).tolist(), "bbox": (x, y, w, h),
+                      "center": (x + w // 2, y + h // 2), "type": kind, "score": score})
+    return hands
+
+
+def _worker_main(make_detector, tasks, results):
+    detector = make_detector()
+    ring = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            ticket, name, shape, slot, height, width, flipType = task
+            try:
+                if ring is None or ring.name != name:
+                    if ring is not None:
+                        ring.close()
+                    ring = FrameRing(shape[0], shape[1:], name=name)
+                img = ring.frames[slot, :height, :width]
+                results.put((ticket, _pack(find_hands(detector, img, False, flipType))))
+            except Exception as e:
+                results.put((ticket, e))
+    finally:
+        if ring is not None:
+            ring.close()
+
+
+class ProcessDetector:
+    """Runs ``make_detector()`` in worker processes fed through a FrameRing.
+
+    ``findHands`` copies the frame into a free ring slot and sends the
+    worker only the slot number; workers read the frame in place and send
+    back landmark arrays. It is thread-safe and blocks until its own frame
+    is done, so calling it from N threads keeps N workers busy.
+    ``make_detector`` must be picklable (a class or ``functools.partial``).
+    """
+
+    def __init__(self, make_detector, workers=2, slots=None):
+        self.workers = workers
+        self.slots = slots or 2 * workers
+        ctx = mp.get_context()
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._processes = []
+        self._closed = False
+        self._ring = None
+        self._ring_lock = threading.Lock()
+        self._free = queue.Queue()
+        self._pending = {}
+        self._done = threading.Condition()
+        self._ticket = 0
+        self.frames = 0
+        # Workers load their models now, in parallel with whatever the caller opens next
+        for _ in range(workers):
+            process = ctx.Process(target=_worker_main, daemon=True,
+                                  args=(make_detector, self._tasks, self._results))
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def stats(self):
+        return {"detector_procs": self.workers, "offloaded_frames": self.frames}
+
+    def _open_ring(self, shape):
+        # Sized from the first frame
+        self._ring = FrameRing(self.slots, shape)
+        for slot in range(self.slots):
+            self._free.put(slot)
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            ticket, result = item
+            with self._done:
+                self._pending[ticket] = result
+                self._done.notify_all()
+
+    def findHands(self, img, draw=True, flipType=True):
+        with self._ring_lock:
+            if self._closed:
+                raise RuntimeError("ProcessDetector is closed")
+            if self._ring is None:
+                self._open_ring(img.shape)
+            ticket = self._ticket
+            self._ticket += 1
+        ring = self._ring
+        height, width = img.shape[:2]
+        if img.shape[2:] != ring.frames.shape[3:] or height > ring.frames.shape[1] \
+                or width > ring.frames.shape[2]:
+            raise ValueError(f"Frame of shape {img.shape} does not fit the ring "
+                             f"({ring.frames.shape[1:]})")
+
+        slot = self._free.get()
+        try:
+            ring.frames[slot, :height, :width] = img
+            self._tasks.put((ticket, ring.name, ring.frames.shape, slot, height, width, flipType))
+            with self._done:
+                while ticket not in self._pending:
+                    if not all(p.is_alive() for p in self._processes):
+                        raise RuntimeError("A detector process exited")
+                    self._done.wait(0.5)
+                result = self._pending.pop(ticket)
+                self.frames += 1
+        finally:
+            self._free.put(slot)
+
+        if isinstance(result, Exception):
+            raise result
+        hands = _unpack(result)
+        if draw:
+            draw_hands(img, hands)
+        return hands, img
+
+    def close(self):
+        with self._ring_lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        if self._ring is not None:
+            self._ring.close(unlink=True)
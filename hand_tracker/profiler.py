@@ -0,0 +1,118 @@
+import json
+import time
+
+import cv2
+import numpy as np
+
+# ===== Configuration =====
+STAGES = ("capture", "flip", "detect", "classify", "effects", "blend", "display")
+PERCENTILES = (50, 95, 99)
+HUD_REFRESH_FRAMES = 30   # Recompute the HUD numbers this often
+# =========================
+
+
+class _Span:
+    # Reusable timer for one stage; each stage is only timed from one thread
+    __slots__ = ("profiler", "column", "row", "start")
+
+    def __init__(self, profiler, column):
+        self.profiler = profiler
+        self.column = column
+        self.row = 0
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._times[self.row, self.column] = (time.perf_counter() - self.start) * 1000
+
+
+class StageProfiler:
+    """Per-frame stage timings in a fixed-size ring buffer.
+
+    Each frame owns one row (``index % capacity``) of a preallocated
+    float64 array, so recording is an array store and nothing grows over a
+    long run. Only rows whose frame reached ``end_frame`` count towards the
+    reported percentiles.
+    """
+
+    def __init__(self, stages=STAGES, capacity=1024):
+        self.stages = tuple(stages)
+        self.capacity = capacity
+        self._columns = {name: i for i, name in enumerate(self.stages)}
+        self._times = np.zeros((capacity, len(self.stages)))   # Milliseconds
+        self._done = np.zeros(capacity, bool)
+        self._spans = {name: _Span(self, i) for name, i in self._columns.items()}
+        self.frames = 0
+        self.dropped = 0
+        self.show_hud = False
+        self._hud_lines = []
+
+    def start_frame(self, index):
+        row = index % self.capacity
+        self._times[row] = 0.0
+        self._done[row] = False
+
+    def end_frame(self, index):
+        self._done[index % self.capacity] = True
+        self.frames += 1
+
+    def record(self, index, stage, seconds):
+        self._times[index % self.capacity, self._columns[stage]] = seconds * 1000
+
+    def measure(self, index, stage):
+        # with profiler.measure(frame.index, "detect"): ...
+        span = self._spans[stage]
+        span.row = index % self.capacity
+        return span
+
+    def summary(self):
+        times = self._times[self._done]
+        result = {"frames": self.frames, "dropped": self.dropped, "stages": {}}
+        if not len(times):
+            return result
+        total = times.sum(axis=1)
+        for name, column in list(self._columns.items()) + [("total", None)]:
+            values = total if column is None else times[:, column]
+            stats = dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(values, PERCENTILES)))
+            stats["mean"] = values.mean()
+            result["stages"][name] = {key: round(float(v), 3) for key, v in stats.items()}
+        return result
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self, prefix="hand_tracker"):
+        summary = self.summary()
+        lines = [f"# TYPE {prefix}_frames_total counter",
+                 f"{prefix}_frames_total {summary['frames']}",
+                 f"# TYPE {prefix}_dropped_frames_total counter",
+                 f"{prefix}_dropped_frames_total {summary['dropped']}",
+                 f"# TYPE {prefix}_stage_latency_ms summary"]
+        for stage, stats in summary["stages"].items():
+            for p in PERCENTILES:
+                lines.append(f'{prefix}_stage_latency_ms{{stage="{stage}",quantile="{p / 100}"}} '
+                             f'{stats[f"p{p}"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        # .prom -> Prometheus text format, anything else -> JSON
+        with open(path, "w") as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
+
+    def draw_hud(self, img):
+        if not self.show_hud:
+            return img
+        if self.frames % HUD_REFRESH_FRAMES == 0 or not self._hud_lines:
+            summary = self.summary()
+            self._hud_lines = [f"{name:<8} {s['p50']:6.1f} {s['p95']:6.1f} {s['p99']:6.1f}"
+                               for name, s in summary["stages"].items()]
+            self._hud_lines.insert(0, f"{'ms':<8} {'p50':>6} {'p95':>6} {'p99':>6}"
+                                      f"   dropped {summary['dropped']}")
+        x, y = 10, img.shape[0] - 25 * len(self._hud_lines) - 10
+        cv2.rectangle(img, (x - 5, y - 20), (x + 420, img.shape[0] - 5), (40, 40, 40), -1)
+        for i, line in enumerate(self._hud_lines):
+            cv2.putText(img, line, (x, y + 25 * i), cv2.FONT_HERSHEY_PLAIN, 1.2, (0, 255, 0), 1)
+        return img
@@ -0,0 +1,227 @@
+import atexit
+import os
+import struct
+import time
+import warnings
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS, draw_hands
+
+# ===== Recording format =====
+# Header: magic, version, record size, frame width, frame height (little endian)
+MAGIC = b"HTLMREC\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHII")
+HEADER_SIZE = 32   # Header padded so records start at an aligned offset
+RECORD_EXT = ".lmrec"
+
+# One record per hand per frame; a frame without hands gets a single record with hand == -1
+RECORD_DTYPE = np.dtype([
+    ("frame", "<u4"),
+    ("hand", "<i1"),
+    ("right", "u1"),
+    ("pad", "V2"),
+    ("time", "<f8"),     # Capture time, seconds since the first recorded frame
+    ("bbox", "<i4", (4,)),
+    ("landmarks", "<f4", (NUM_LANDMARKS, 3)),
+])
+# ============================
+
+
+class LandmarkWriter:
+    """Appends frames of hands to a recording file.
+
+    Records are staged in a preallocated array and written in blocks of
+    ``block`` records, so writing a frame does no per-hand allocation.
+    """
+
+    def __init__(self, path, width, height, block=1024):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, width, height)
+                        .ljust(HEADER_SIZE, b"\0"))
+        self._block = np.zeros(block, RECORD_DTYPE)
+        self._count = 0
+        self.frames = 0
+
+    def write(self, timestamp, hands):
+        for i, hand in enumerate(hands or [None]):
+            if self._count == len(self._block):
+                self.flush()
+            record = self._block[self._count]
+            record["frame"] = self.frames
+            record["time"] = timestamp
+            if hand is None:
+                record["hand"] = -1
+                record["right"] = 0
+                record["bbox"] = 0
+                record["landmarks"] = 0
+            else:
+                record["hand"] = i
+                record["right"] = hand["type"] == "Right"
+                record["bbox"] = hand["bbox"]
+                record["landmarks"] = np.asarray(hand["lmList"], np.float32)[:NUM_LANDMARKS, :3]
+            self._count += 1
+        self.frames += 1
+
+    def flush(self):
+        self._block[:self._count].tofile(self.file)
+        self._count = 0
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class LandmarkRecording:
+    """A recording file memory-mapped for random access.
+
+    ``records`` is a read-only structured array backed by the file, so
+    slicing it (or ``recording[a:b]`` for whole frames) copies nothing.
+    Frame ``i`` spans ``records[starts[i]:starts[i + 1]]``.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"Not a landmark recording: {path}")
+        magic, version, record_size, self.width, self.height = HEADER.unpack_from(header)
+        if magic != MAGIC:
+            raise ValueError(f"Not a landmark recording: {path}")
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Unsupported recording version {version} in {path}")
+        self.path = path
+        count, partial = divmod(os.path.getsize(path) - HEADER_SIZE, RECORD_DTYPE.itemsize)
+        if partial:
+            warnings.warn(f"{path} ends in a partial record ({partial} bytes); ignoring it")
+        if count:
+            self.records = np.memmap(path, RECORD_DTYPE, mode="r", offset=HEADER_SIZE,
+                                     shape=(count,))
+        else:   # No records yet; mmap can't map an empty range
+            self.records = np.zeros(0, RECORD_DTYPE)
+        frames = self.records["frame"]
+        self.starts = np.flatnonzero(np.r_[len(frames) > 0, frames[1:] != frames[:-1]])
+        self._bounds = np.r_[self.starts, len(self.records)]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        # Records of one frame, or of a range of frames
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Frame slices must be contiguous")
+            return self.records[self._bounds[start]:self._bounds[max(start, stop)]]
+        index = range(len(self))[index]
+        return self.records[self._bounds[index]:self._bounds[index + 1]]
+
+    @property
+    def timestamps(self):
+        return self.records["time"][self.starts]
+
+    @property
+    def valid(self):
+        # Mask of records that hold a hand
+        return self.records["hand"] >= 0
+
+    def hands(self, index):
+        """Frame ``index`` as cvzone-style hand dicts."""
+        hands = []
+        for record in self[index]:
+            if record["hand"] < 0:
+                continue
+            x, y, w, h = (int(v) for v in record["bbox"])
+            hands.append({"lmList": record["landmarks"].tolist(),
+                          "bbox": (x, y, w, h),
+                          "center": (x + w // 2, y + h // 2),
+                          "type": "Right" if record["right"] else "Left"})
+        return hands
+
+
+class RecordingDetector:
+    """Passes detections through and appends every frame's hands to ``path``.
+
+    Frames are stamped with ``clock()``, which the pipeline points at the
+    capture time of the frame being detected.
+    """
+
+    def __init__(self, detector, path, clock=time.perf_counter):
+        self.detector = detector
+        self.path = path
+        self.clock = clock
+        self.writer = None
+        self._start = None
+        atexit.register(self.close)
+
+    def stats(self):
+        return {"recorded_frames": self.writer.frames if self.writer else 0}
+
+    def findHands(self, img, draw=True, flipType=True):
+        result = self.detector.findHands(img, draw=draw, flipType=flipType)
+        hands = result[0] if isinstance(result, tuple) else result
+        now = self.clock()
+        if self.writer is None:
+            self.writer = LandmarkWriter(self.path, img.shape[1], img.shape[0])
+            self._start = now
+        self.writer.write(now - self._start, hands)
+        return hands, img
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ReplayDetector:
+    """Stands in for HandDetector, returning the recorded hands frame by frame."""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.frames = 0
+
+    def stats(self):
+        return {"replayed_frames": self.frames}
+
+    def findHands(self, img, draw=True, flipType=True):
+        hands = self.recording.hands(self.frames) if self.frames < len(self.recording) else []
+        self.frames += 1
+        if draw:
+            draw_hands(img, hands)
+        return hands, img
+
+
+class ReplaySource:
+    """Blank frames at the recorded size, one per recorded frame.
+
+    ``timestamp`` is the recorded capture time of the last frame read, so
+    a replay sees the timing of the original run however fast it goes.
+    """
+
+    live = False
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.timestamp = None
+        self._times = recording.timestamps
+        self._count = 0
+
+    def read(self):
+        if self._count >= len(self.recording):
+            return False, None
+        self.timestamp = float(self._times[self._count])
+        self._count += 1
+        return True, np.zeros((self.recording.height, self.recording.width, 3), np.uint8)
+
+    def release(self):
+        pass
+
+
+def add_recording_args(parser):
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help=f"save every frame's hands to a landmark recording ({RECORD_EXT})")
+    parser.add_argument("--replay", default=None, metavar="PATH",
+                        help="replay a landmark recording instead of the camera and detector")
+    return parser
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# ===== Configuration =====
+SPRITE_CACHE = 64   # Label sprites kept, least recently used dropped first
+# =========================
+
+
+@lru_cache(maxsize=256)
+def text_size(text, font, scale, thickness):
+    # cv2.getTextSize result, computed once per label/style
+    return cv2.getTextSize(text, font, scale, thickness)
+
+
+def _merge_rects(rects):
+    # Merge overlapping rects so no pixel is blended twice
+    merged = []
+    for rect in rects:
+        x0, y0, x1, y1 = rect
+        changed = True
+        while changed:
+            changed = False
+            for other in merged:
+                if x0 < other[2] and other[0] < x1 and y0 < other[3] and other[1] < y1:
+                    merged.remove(other)
+                    x0, y0 = min(x0, other[0]), min(y0, other[1])
+                    x1, y1 = max(x1, other[2]), max(y1, other[3])
+                    changed = True
+                    break
+        merged.append((x0, y0, x1, y1))
+    return merged
+
+
+class Compositor:
+    """Blends gesture effects over the frame without full-frame copies.
+
+    Drawing calls between ``begin`` and ``end`` are recorded with their
+    bounding rects. ``end`` copies only those rects of the frame into a
+    preallocated effect layer, replays the drawing there and blends the
+    rects back into the frame in place. When nothing was drawn, ``end``
+    does no work at all. ``label`` stamps text from sprites cached per
+    text and style; the ``sprite_cache`` most recently used are kept.
+    """
+
+    def __init__(self, alpha=0.7, sprite_cache=SPRITE_CACHE):
+        self.alpha = alpha
+        self._layer = None
+        self._img = None
+        self._ops = []
+        self._rects = []
+        self.sprite_cache = sprite_cache
+        self._sprites = OrderedDict()
+
+    def begin(self, img):
+        if self._layer is None or self._layer.shape != img.shape:
+            self._layer = np.empty_like(img)
+        self._img = img
+        self._ops.clear()
+        self._rects.clear()
+
+    def _add(self, x0, y0, x1, y1, draw, *args):
+        h, w = self._img.shape[:2]
+        x0, y0 = max(int(x0), 0), max(int(y0), 0)
+        x1, y1 = min(int(x1), w), min(int(y1), h)
+        if x0 < x1 and y0 < y1:
+            self._rects.append((x0, y0, x1, y1))
+            self._ops.append((draw, args))
+
+    # ===== Drawing calls (same arguments as cv2) =====
+    def line(self, pt1, pt2, color, thickness=1):
+        pad = thickness + 2
+        self._add(min(pt1[0], pt2[0]) - pad, min(pt1[1], pt2[1]) - pad,
+                  max(pt1[0], pt2[0]) + pad, max(pt1[1], pt2[1]) + pad,
+                  cv2.line, pt1, pt2, color, thickness)
+
+    def rectangle(self, pt1, pt2, color, thickness=1):
+        pad = max(thickness, 0) + 2
+        self._add(min(pt1[0], pt2[0]) - pad, min(pt1[1], pt2[1]) - pad,
+                  max(pt1[0], pt2[0]) + pad, max(pt1[1], pt2[1]) + pad,
+                  cv2.rectangle, pt1, pt2, color, thickness)
+
+    def circle(self, center, radius, color, thickness=1):
+        pad = radius + max(thickness, 0) + 2
+        self._add(center[0] - pad, center[1] - pad, center[0] + pad, center[1] + pad,
+                  cv2.circle, center, radius, color, thickness)
+
+    def putText(self, text, org, font, scale, color, thickness=1):
+        (tw, th), baseline = text_size(text, font, scale, thickness)
+        pad = thickness + 2
+        self._add(org[0] - pad, org[1] - th - pad, org[0] + tw + pad, org[1] + baseline + pad,
+                  cv2.putText, text, org, font, scale, color, thickness)
+    # ================================================
+
+    def end(self):
+        img = self._img
+        if not self._ops:
+            return img
+        rects = _merge_rects(self._rects)
+        layer = self._layer
+        for x0, y0, x1, y1 in rects:
+            layer[y0:y1, x0:x1] = img[y0:y1, x0:x1]
+        for draw, args in self._ops:
+            draw(layer, *args)
+        for x0, y0, x1, y1 in rects:
+            roi = img[y0:y1, x0:x1]
+            cv2.addWeighted(roi, 1 - self.alpha, layer[y0:y1, x0:x1], self.alpha, 0, dst=roi)
+        return img
+
+    def _sprite(self, text, font, scale, color, thickness):
+        key = (text, font, scale, color, thickness)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+        else:
+            (tw, th), baseline = text_size(text, font, scale, thickness)
+            mask = np.zeros((th + baseline + 2*thickness, tw + 2*thickness), np.uint8)
+            cv2.putText(mask, text, (thickness, th + thickness), font, scale, 255, thickness)
+            # Premultiplied colour and inverse coverage, so stamping is one multiply-add
+            alpha = mask[:, :, None].astype(np.float32) / 255
+            fg = alpha * np.array(color, np.float32) + 0.5
+            sprite = (fg, 1 - alpha, th + thickness, tw)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.sprite_cache:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    def label(self, img, text, org, font, scale, color, thickness=1, center=False):
+        """Stamp a text label from a cached sprite (org as for cv2.putText)."""
+        fg, inv_alpha, ascent, width = self._sprite(text, font, scale, color, thickness)
+        x = org[0] - (width // 2 if center else 0) - thickness
+        y = org[1] - ascent
+        h, w = img.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + fg.shape[1], w), min(y + fg.shape[0], h)
+        if x0 < x1 and y0 < y1:
+            roi = img[y0:y1, x0:x1]
+            sx, sy = slice(x0 - x, x1 - x), slice(y0 - y, y1 - y)
+            roi[...] = roi * inv_alpha[sy, sx] + fg[sy, sx]
+        return img
@@ -1,89 +1,97 @@
-import cv2
 import time
-from cvzone.HandTrackingModule import HandDetector
-from collections import deque
+from functools import partial
+
+import cv2
+from detection import hand_detector, print_detector_stats
+from events import open_events
+from gestures import RPS_RULES, GestureTable
+from landmarks import LandmarkBuffer, finger_states
+from motion import MotionBank
+from pipeline import Pipeline, build_arg_parser, open_input, pipeline_options
+from rps_game import RoundEngine, add_game_args, players_by_position
+from session import open_session
+from smoothing import LandmarkFilterBank
+from stabilizer import StabilizerBank
+from startup import startup
+from tracking import HandTracker
 
 # ===== Configuration =====
 CAM_WIDTH = 1280
 CAM_HEIGHT = 720
-HISTORY_LENGTH = 10  # Number of frames for gesture stabilization
+HISTORY_LENGTH = 5   # Number of frames for gesture stabilization (landmarks are smoothed)
 GESTURE_COLORS = {
     'Rock ✊': (0, 0, 255),
     'Paper 🖐️': (0, 255, 0),
     'Scissors ✌️': (255, 0, 0),
     'Unknown': (255, 255, 255)
 }
+MOTION_SHOW_SECONDS = 1.0   # How long a recognized swipe/circle/wave stays next to the hand
 # =========================
 
-def count_fingers(lmList, hand_type):
-    fingers = []
-    
-    # Thumb detection
-    if hand_type == "Right":
-        thumb_open = lmList[4][0] > lmList[3][0]
-    else:
-        thumb_open = lmList[4][0] < lmList[3][0]
-    fingers.append(thumb_open)
-    
-    # Other fingers
-    tip_ids = [8, 12, 16, 20]
-    for tip in tip_ids:
-        fingers.append(lmList[tip][1] < lmList[tip-2][1])
+def main(argv=None):
+    args = add_game_args(build_arg_parser("Rock Paper Scissors")).parse_args(argv)
+    source, detector = open_input(args, CAM_WIDTH, CAM_HEIGHT,
+                                  partial(hand_detector, maxHands=2, detectionCon=0.8, minTrackCon=0.5))
     
-    return sum(fingers)
+    stabilizers = StabilizerBank(window=HISTORY_LENGTH)  # One vote per hand
+    tracker = HandTracker()  # Stable hand ids; keeps each hand's movement trail
+    motions = MotionBank()  # Swipes, circles, waves and pinch-drags from the same movement
+    shown_motions = {}  # track id -> (motion gesture, when it was seen)
+    landmarks = LandmarkBuffer(max_hands=2)
+    smoothing = LandmarkFilterBank(max_hands=2, enabled=not args.no_smoothing)
+    gestures = GestureTable(RPS_RULES)
+    events = open_events(args)  # Gesture changes/landmarks for other programs
+    recorder = open_session(args)  # Saves what is shown, off the render thread
+    # Rounds are timed by capture timestamps and judged on raw poses around "shoot"
+    game = RoundEngine(args.game, countdown=args.countdown, seed=args.seed) if args.game else None
+    game_text = [""]
 
-def detect_gesture(finger_count, lmList):
-    # Rock-Paper-Scissors Logic
-    if finger_count == 0:
-        return 'Rock ✊'
-    elif finger_count == 5:
-        return 'Paper 🖐️'
-    elif finger_count == 2:
-        # Verify scissors position (index and middle fingers up)
-        if lmList[8][1] < lmList[6][1] and lmList[12][1] < lmList[10][1]:
-            return 'Scissors ✌️'
-    return 'Unknown'
+    def process(img):
+        return detector.findHands(img, draw=True, flipType=False)
 
-def main():
-    cap = cv2.VideoCapture(0)
-    cap.set(3, CAM_WIDTH)
-    cap.set(4, CAM_HEIGHT)
-    
-    detector = HandDetector(maxHands=2, detectionCon=0.8, minTrackCon=0.5)
-    gesture_history = deque(maxlen=HISTORY_LENGTH)
-    pTime = 0  # For FPS calculation
-    trail_points = []  # For movement trail effect
+    def render(frame, result):
+        hands, img = result
+        profiler = pipeline.profiler
+        panel_history = []
 
-    while True:
-        success, img = cap.read()
-        if not success:
-            print("Failed to capture frame")
-            break
-        
-        # Flip image horizontally for mirror effect
-        img = cv2.flip(img, 1)
-        
-        hands = detector.findHands(img, draw=True, flipType=False)
-        current_gestures = []
+        with profiler.measure(frame.index, "classify"):
+            lms, is_right = landmarks.load(hands)
+            track_ids = tracker.update(landmarks.hands).tolist()
+            for track_id in tracker.ended:
+                stabilizers.discard(track_id)
+                motions.discard(track_id)
+                shown_motions.pop(track_id, None)
+            smoothing.filter(track_ids, lms, frame.timestamp)
+            labels = gestures.classify_batch(finger_states(lms, is_right))
+            stable_gestures = []
+            for track_id, gesture, hand in zip(track_ids, labels, landmarks.hands):
+                # Get stable gesture from this hand's history, weighted by detector confidence
+                stabilizer = stabilizers[track_id]
+                stable_gestures.append(stabilizer.update(gesture, hand.get("score", 1.0)))
+                if not panel_history:
+                    panel_history = stabilizer.labels
+            events.update(frame, track_ids, stable_gestures, lms,
+                          [hand["type"] for hand in landmarks.hands])
+            for track_id, lmList in zip(track_ids, lms):
+                motion = motions.update(track_id, lmList, frame.timestamp)
+                if motion:
+                    shown_motions[track_id] = motion, frame.timestamp
+                    events.motion(frame, track_id, motion)
+            if any(gesture != 'Unknown' for gesture in stable_gestures):
+                startup.mark("first_gesture")
+            if game is not None:
+                if source.live:
+                    # Replays keep their recorded timing: no host-dependent latency
+                    game.observe_latency(time.perf_counter() - frame.arrived)
+                game_text[0], decided = game.update(
+                    frame.timestamp, players_by_position(lms, labels, img.shape[1], game.humans))
+                if decided:
+                    print(f"Round {decided['round']}: {game.describe(decided)}")
+                    events.round_result(frame, decided)
 
-        if hands:
-            for hand in hands:
-                lmList = hand["lmList"]
+        with profiler.measure(frame.index, "effects"):
+            for hand, track_id, stable_gesture in zip(landmarks.hands, track_ids, stable_gestures):
                 bbox = hand["bbox"]
-                hand_type = hand["type"]
-                
-                if not lmList or len(lmList) < 21:
-                    continue
-                
-                # Count fingers and detect gesture
-                finger_count = count_fingers(lmList, hand_type)
-                gesture = detect_gesture(finger_count, lmList)
-                current_gestures.append(gesture)
-                
-                # Get stable gesture from history
-                gesture_history.append(gesture)
-                stable_gesture = max(set(gesture_history), 
-                                   key=lambda x: list(gesture_history).count(x))
                 
                 # Draw hand-specific elements
                 color = GESTURE_COLORS.get(stable_gesture, (255,255,255))
@@ -97,37 +105,42 @@ def main():
                 cv2.putText(img, stable_gesture, 
                           (bbox[0]-50, bbox[1]-50 if bbox[1]-50 > 50 else bbox[1]+50),
                           cv2.FONT_HERSHEY_SIMPLEX, 1.5, color, 3)
+                motion, seen = shown_motions.get(track_id, ("", 0.0))
+                if motion and frame.timestamp - seen < MOTION_SHOW_SECONDS:
+                    cv2.putText(img, motion, (bbox[0]-50, bbox[1]+bbox[3]+60),
+                              cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0,255,255), 3)
                 
-                # Movement trail effect
-                wrist_pos = (lmList[0][0], lmList[0][1])
-                trail_points.append(wrist_pos)
-                if len(trail_points) > 20:
-                    trail_points.pop(0)
-                
-                # Draw trail
-                for i, point in enumerate(trail_points):
-                    cv2.circle(img, point, 5-i//4, color, cv2.FILLED)
+                # Movement trail effect (this hand's own trail)
+                for i, (x, y) in enumerate(tracker.trail(track_id).tolist()):
+                    cv2.circle(img, (x, y), 5-i//4, color, cv2.FILLED)
 
-        # Gesture history panel
-        cv2.rectangle(img, (10, 10), (300, 50 + 30*HISTORY_LENGTH), (40,40,40), -1)
-        for i, gesture in enumerate(gesture_history):
-            y = 40 + i*30
-            cv2.putText(img, f"{i+1}. {gesture}", (20, y),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 1)
+            # Gesture history panel (first visible hand)
+            cv2.rectangle(img, (10, 10), (300, 50 + 30*HISTORY_LENGTH), (40,40,40), -1)
+            for i, gesture in enumerate(panel_history):
+                y = 40 + i*30
+                cv2.putText(img, f"{i+1}. {gesture}", (20, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 1)
 
-        # FPS calculation
-        cTime = time.time()
-        fps = 1 / (cTime - pTime)
-        pTime = cTime
-        cv2.putText(img, f"FPS: {int(fps)}", (CAM_WIDTH-200, 50),
-                cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,0), 2)
+            if game is not None:
+                # Countdown / result and the score
+                size, _ = cv2.getTextSize(game_text[0], cv2.FONT_HERSHEY_SIMPLEX, 2, 5)
+                cv2.putText(img, game_text[0], ((img.shape[1]-size[0])//2, img.shape[0]-60),
+                        cv2.FONT_HERSHEY_SIMPLEX, 2, (0,255,255), 5)
+                cv2.putText(img, f"{game.players[0]} {game.scores[0]} - {game.scores[1]} {game.players[1]}",
+                        (img.shape[1]//2 - 200, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
 
-        cv2.imshow("Gesture Control", img)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            # FPS (measured at the render stage)
+            cv2.putText(img, f"FPS: {int(pipeline.fps)}", (img.shape[1]-200, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,0), 2)
+        recorder.write(frame, img, stable_gestures)
+        return img
 
-    cap.release()
-    cv2.destroyAllWindows()
+    # Flip image horizontally for mirror effect
+    pipeline = Pipeline(source, process, render, window="Gesture Control", flip=True,
+                        **pipeline_options(args))
+    pipeline.run()
+    print_detector_stats(detector)
+    recorder.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,199 @@
+import argparse
+import random
+from collections import Counter, deque
+
+from gestures import RPS_RULES, GestureTable
+from landmarks import WRIST, LandmarkBuffer, finger_states
+from recording import LandmarkRecording, ReplayDetector, ReplaySource
+from smoothing import LandmarkFilterBank
+from tracking import HandTracker
+
+# ===== Configuration =====
+ROCK, PAPER, SCISSORS = (name for name, _ in RPS_RULES)
+BEATS = {ROCK: SCISSORS, PAPER: ROCK, SCISSORS: PAPER}
+COUNTDOWN = 3.0        # Seconds from round start to "shoot"
+THROW_WINDOW = 0.25    # Poses within this many seconds of "shoot" decide the throw
+RESULT_SECONDS = 2.0   # Result stays up this long before the next round
+LATENCY_ALPHA = 0.1    # Smoothing of the measured capture -> render latency
+# =========================
+
+
+class RoundEngine:
+    """Rock-paper-scissors rounds timed entirely by frame capture timestamps.
+
+    ``update(timestamp, throws)`` takes the capture time of a frame and the
+    raw (unstabilized) pose of each player in it, ``None`` for a missing
+    hand (see ``players_by_position``). In ``"cpu"`` mode player 0 plays a
+    seeded computer; in ``"duel"`` mode players 0 and 1 play each other.
+
+    The countdown shown with a frame is for its estimated display time
+    (capture time plus ``latency``, frozen at the start of each round), so
+    "SHOOT!" appears on screen at the shoot moment. Each throw is the
+    majority pose among frames captured within ``window`` seconds of that
+    moment, so neither the stabilizer's vote lag nor pipeline latency shifts
+    it. A round is decided by the first frame captured after the window;
+    no decision depends on when a frame gets processed, so replaying the
+    same frames always gives the same rounds.
+    """
+
+    def __init__(self, mode="cpu", countdown=COUNTDOWN, window=THROW_WINDOW,
+                 result_seconds=RESULT_SECONDS, latency=0.0, seed=0):
+        if mode not in ("cpu", "duel"):
+            raise ValueError(f"mode must be 'cpu' or 'duel': {mode!r}")
+        self.mode = mode
+        self.countdown = countdown
+        self.window = window
+        self.result_seconds = result_seconds
+        self.latency = latency   # Updated by observe_latency; each round freezes its own copy
+        self.seed = seed
+        self.round = 0
+        self.scores = [0, 0]
+        self.results = []        # One dict per decided round
+        self._start = None
+        self._samples = deque()  # (capture time, throws) around the shoot moment
+
+    @property
+    def players(self):
+        return ("Player", "CPU") if self.mode == "cpu" else ("Player 1", "Player 2")
+
+    @property
+    def humans(self):
+        return 1 if self.mode == "cpu" else 2
+
+    def observe_latency(self, seconds):
+        self.latency += LATENCY_ALPHA * (seconds - self.latency)
+
+    def _begin(self, timestamp):
+        self.round += 1
+        self._start = timestamp
+        self._round_latency = self.latency
+        self._shoot = timestamp + self.countdown
+        self._next = self._shoot + self.window + self.result_seconds
+        self._samples.clear()
+        self._decided = None
+        # Chosen before the player throws, from the seed and round alone
+        self._cpu = random.Random(self.seed * 100003 + self.round).choice((ROCK, PAPER, SCISSORS))
+
+    def _throw(self, player):
+        votes = Counter(throws[player] for _, throws in self._samples
+                        if len(throws) > player and throws[player] in BEATS)
+        if not votes:
+            return None
+        # Most votes; ties go to the pose seen closest to the shoot moment
+        best = max(votes.values())
+        closest = sorted(self._samples, key=lambda sample: abs(sample[0] - self._shoot))
+        for _, throws in closest:
+            if len(throws) > player and votes.get(throws[player]) == best:
+                return throws[player]
+
+    def _decide(self):
+        moves = [self._throw(0), self._cpu if self.mode == "cpu" else self._throw(1)]
+        if moves[0] is None and moves[1] is None:
+            winner = None
+        elif moves[1] is None or BEATS.get(moves[0]) == moves[1]:
+            winner = 0
+        elif moves[0] is None or BEATS.get(moves[1]) == moves[0]:
+            winner = 1
+        else:
+            winner = None   # Same throw
+        if winner is not None:
+            self.scores[winner] += 1
+        self._decided = {"round": self.round, "shoot": round(self._shoot, 4),
+                         "latency": round(self._round_latency, 4), "moves": moves,
+                         "winner": None if winner is None else self.players[winner],
+                         "scores": list(self.scores)}
+        self.results.append(self._decided)
+        return self._decided
+
+    def update(self, timestamp, throws):
+        """Advance to a frame; returns (text to show, round result if decided by this frame)."""
+        if self._start is None or (self._decided is not None and timestamp >= self._next):
+            self._begin(timestamp)
+        decided = None
+        if self._decided is None:
+            if abs(timestamp - self._shoot) <= self.window:
+                self._samples.append((timestamp, list(throws)))
+            elif timestamp > self._shoot + self.window:
+                decided = self._decide()
+
+        if self._decided is not None:
+            return self.describe(self._decided), decided
+        remaining = self._shoot - (timestamp + self._round_latency)
+        return ("SHOOT!" if remaining <= 0 else str(int(remaining) + 1)), None
+
+    def describe(self, result):
+        moves = " vs ".join(move or "no throw" for move in result["moves"])
+        outcome = f"{result['winner']} wins" if result["winner"] else "Draw"
+        return f"{moves}: {outcome}"
+
+
+def players_by_position(lms, labels, width, players=2):
+    """Pose of each player, left to right on screen; ``None`` where a hand is missing.
+
+    Hands are taken left to right. With two players and a single hand in
+    view, that hand plays for the half of the frame its wrist is in, so a
+    player who drops out doesn't hand their side to the other.
+    """
+    order = sorted(range(len(labels)), key=lambda i: lms[i, WRIST, 0])[:players]
+    throws = [labels[i] for i in order]
+    if players == 2 and len(order) == 1 and lms[order[0], WRIST, 0] >= width / 2:
+        throws.insert(0, None)
+    return throws
+
+
+def replay_rounds(recording, engine, smoothing=True):
+    """Play the rounds of a landmark recording through ``engine``, as ``rps.py --replay`` does.
+
+    Frames come from the same ReplaySource/ReplayDetector pair, stamped with
+    their recorded capture times, so the rounds don't depend on host speed.
+    """
+    source, detector = ReplaySource(recording), ReplayDetector(recording)
+    landmarks = LandmarkBuffer(max_hands=2)
+    tracker = HandTracker()
+    smoother = LandmarkFilterBank(max_hands=2, enabled=smoothing)
+    gestures = GestureTable(RPS_RULES)
+    while True:
+        success, img = source.read()
+        if not success:
+            break
+        hands, _ = detector.findHands(img, draw=False, flipType=False)
+        lms, is_right = landmarks.load(hands)
+        track_ids = tracker.update(landmarks.hands).tolist()
+        smoother.filter(track_ids, lms, source.timestamp)
+        labels = gestures.classify_batch(finger_states(lms, is_right))
+        engine.update(source.timestamp,
+                      players_by_position(lms, labels, recording.width, engine.humans))
+    return engine.results
+
+
+def add_game_args(parser):
+    parser.add_argument("--game", choices=("cpu", "duel"), default=None,
+                        help="play rounds against the computer, or two hands against each other")
+    parser.add_argument("--countdown", type=float, default=COUNTDOWN, metavar="SECONDS")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the computer's throws")
+    return parser
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay a landmark recording through the rock-paper-scissors rounds")
+    parser.add_argument("recording", help="recording made with --record")
+    parser.add_argument("--mode", choices=("cpu", "duel"), default="cpu")
+    parser.add_argument("--countdown", type=float, default=COUNTDOWN, metavar="SECONDS")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="capture -> display latency to assume for the countdown")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-smoothing", action="store_true")
+    args = parser.parse_args(argv)
+
+    engine = RoundEngine(args.mode, countdown=args.countdown, latency=args.latency_ms / 1000,
+                         seed=args.seed)
+    for result in replay_rounds(LandmarkRecording(args.recording), engine,
+                                smoothing=not args.no_smoothing):
+        print(f"Round {result['round']} (shoot at {result['shoot']:.2f}s): "
+              f"{engine.describe(result)}")
+    print(f"Score: {engine.players[0]} {engine.scores[0]} - {engine.scores[1]} {engine.players[1]}")
+
+
+if __name__ == "__main__":
+    main()
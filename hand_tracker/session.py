@@ -0,0 +1,186 @@
+import atexit
+import json
+import os
+import queue
+import threading
+from collections import deque
+
+import cv2
+
+# ===== Configuration =====
+QUEUE_SIZE = 64        # Frames waiting for the encoder
+DROP_POLICIES = ("oldest", "newest", "block")
+PREROLL_QUALITY = 85   # JPEG quality of frames held in the pre-roll buffer
+# =========================
+
+_STOP = object()
+
+
+class SessionRecorder:
+    """Saves the rendered output as video, with a JSON-lines sidecar of gestures.
+
+    ``write`` only scales (or copies) the frame and queues it; a writer
+    thread encodes, so the render loop never waits on ``cv2.VideoWriter``.
+    When the queue is full, ``drop`` discards the ``oldest`` queued frame or
+    the ``newest`` one, or ``block``s until there is room. The sidecar
+    (``<path>.jsonl``) has one line per video frame with the frame index,
+    capture time and gestures.
+
+    With ``trigger`` set, frames are only kept for ``preroll`` seconds (as
+    JPEG, to bound memory) until that gesture is seen; then the pre-roll and
+    the next ``postroll`` seconds are saved as a clip, ``<name>_001<ext>``
+    and so on. Without a ``path`` the recorder does nothing.
+    """
+
+    def __init__(self, path=None, fps=30.0, codec="mp4v", scale=1.0, queue_size=QUEUE_SIZE,
+                 drop="oldest", trigger=None, preroll=5.0, postroll=2.0):
+        if drop not in DROP_POLICIES:
+            raise ValueError(f"drop must be one of {', '.join(DROP_POLICIES)}: {drop!r}")
+        self.path = path
+        self.fps = fps
+        self.codec = codec
+        self.scale = scale
+        self.drop = drop
+        self.trigger = trigger
+        self.postroll = postroll
+        self.written = 0
+        self.dropped = 0
+        self.clips = 0
+        self.error = None   # Raised by the next write if the writer thread failed
+        if path is None:
+            return
+        self._queue = queue.Queue(queue_size)
+        self._preroll = deque(maxlen=max(1, round(preroll * fps)))
+        self._video = self._sidecar = None
+        self._clip_until = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, frame, img, gestures=()):
+        """Queue a rendered frame; never blocks unless ``drop='block'``."""
+        if self.path is None:
+            return
+        if self.error is not None:
+            raise self.error
+        if self.drop == "newest" and self._queue.full():
+            self.dropped += 1
+            return
+        if self.scale != 1.0:
+            h, w = img.shape[:2]
+            size = (max(2, round(w * self.scale)) // 2 * 2, max(2, round(h * self.scale)) // 2 * 2)
+            img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        else:
+            img = img.copy()   # The render buffer is reused for the next frame
+        item = (frame.index, frame.timestamp, img, list(gestures))
+        if self.drop == "block":
+            self._queue.put(item)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def stats(self):
+        return {"video_frames": self.written, "video_dropped": self.dropped, "clips": self.clips}
+
+    def _open(self, path, img):
+        h, w = img.shape[:2]
+        self._video = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.codec), self.fps, (w, h))
+        if not self._video.isOpened():
+            raise IOError(f"Could not open video writer ({self.codec}) for {path}")
+        self._sidecar = open(path + ".jsonl", "w", encoding="utf-8")
+        self._frames = 0
+
+    def _emit(self, index, timestamp, img, gestures):
+        self._video.write(img)
+        self._sidecar.write(json.dumps({"frame": index, "time": round(timestamp, 4),
+                                        "video_frame": self._frames, "gestures": gestures},
+                                       ensure_ascii=False) + "\n")
+        self._frames += 1
+        self.written += 1
+
+    def _close_output(self):
+        if self._video is not None:
+            self._video.release()
+            self._sidecar.close()
+            self._video = self._sidecar = None
+
+    def _clip(self, index, timestamp, img, gestures):
+        # Pre-roll until the trigger shows up, then a clip until postroll runs out
+        if self._video is not None and timestamp > self._clip_until:
+            self._close_output()
+        if self.trigger in gestures:
+            if self._video is None:
+                self.clips += 1
+                root, ext = os.path.splitext(self.path)
+                self._open(f"{root}_{self.clips:03d}{ext}", img)
+                for held in self._preroll:
+                    held_index, held_time, jpeg, held_gestures = held
+                    self._emit(held_index, held_time, cv2.imdecode(jpeg, cv2.IMREAD_COLOR),
+                               held_gestures)
+                self._preroll.clear()
+            self._clip_until = timestamp + self.postroll
+        if self._video is not None:
+            self._emit(index, timestamp, img, gestures)
+        else:
+            _, jpeg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, PREROLL_QUALITY])
+            self._preroll.append((index, timestamp, jpeg, gestures))
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                if self.trigger is not None:
+                    self._clip(*item)
+                    continue
+                if self._video is None:
+                    self._open(self.path, item[2])
+                self._emit(*item)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._close_output()
+
+    def close(self):
+        if self.path is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)   # After every queued frame
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        if self.trigger is None:
+            print(f"Saved {self.written} frames to {self.path} (dropped {self.dropped})")
+        else:
+            print(f"Saved {self.clips} clips of {self.trigger!r} to {self.path} "
+                  f"(dropped {self.dropped})")
+
+
+def add_session_args(parser):
+    parser.add_argument("--save-video", default=None, metavar="PATH",
+                        help="save the annotated output as video, with gestures in PATH.jsonl")
+    parser.add_argument("--video-codec", default="mp4v", metavar="FOURCC")
+    parser.add_argument("--video-scale", type=float, default=1.0,
+                        help="scale saved frames by this factor")
+    parser.add_argument("--video-fps", type=float, default=30.0)
+    parser.add_argument("--video-drop", choices=DROP_POLICIES, default="oldest",
+                        help="frame to drop when the encoder falls behind ('block' drops none)")
+    parser.add_argument("--clip-on", default=None, metavar="GESTURE",
+                        help="only save clips around this gesture, starting --preroll seconds earlier")
+    parser.add_argument("--preroll", type=float, default=5.0, metavar="SECONDS")
+    parser.add_argument("--postroll", type=float, default=2.0, metavar="SECONDS")
+    return parser
+
+
+def open_session(args):
+    return SessionRecorder(args.save_video, fps=args.video_fps, codec=args.video_codec,
+                           scale=args.video_scale, drop=args.video_drop, trigger=args.clip_on,
+                           preroll=args.preroll, postroll=args.postroll)
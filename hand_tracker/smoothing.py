@@ -0,0 +1,87 @@
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+# ===== Configuration =====
+MIN_CUTOFF = 1.0    # Hz; lower = smoother while the hand is still
+BETA = 0.02         # Cutoff increase per px/s of speed; higher = less lag when moving
+D_CUTOFF = 1.0      # Hz; cutoff for the speed estimate
+DEFAULT_DT = 1 / 30
+# =========================
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class LandmarkFilterBank:
+    """One-Euro filters on every landmark coordinate of every hand.
+
+    Filter state for up to ``max_hands`` hands lives in preallocated
+    (max_hands, 21, 3) arrays, and ``filter`` updates all hands of a frame
+    in one vectorised step. Hands are matched to state by key (e.g. hand
+    type); a key missing from a frame frees its slot, so a returning hand
+    starts fresh instead of being dragged from its old position. With
+    ``enabled=False`` landmarks pass through untouched.
+    """
+
+    def __init__(self, max_hands=2, min_cutoff=MIN_CUTOFF, beta=BETA, d_cutoff=D_CUTOFF,
+                 enabled=True):
+        self.max_hands = max_hands
+        self.enabled = enabled
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = np.zeros((max_hands, NUM_LANDMARKS, 3), np.float32)
+        self._dx = np.zeros((max_hands, NUM_LANDMARKS, 3), np.float32)
+        self._t = np.zeros(max_hands)
+        self._slots = {}
+
+    def _assign(self, keys):
+        # Slot per key; a duplicate or new key gets a free slot and fresh state
+        slots = {key: slot for key, slot in self._slots.items() if key in keys}
+        free = [slot for slot in range(self.max_hands) if slot not in slots.values()]
+        rows, fresh = [], []
+        for key in keys:
+            if key in slots and slots[key] not in rows:
+                rows.append(slots[key])
+                fresh.append(False)
+            else:
+                slots.setdefault(key, free[0])
+                rows.append(free.pop(0))
+                fresh.append(True)
+        self._slots = slots
+        return np.array(rows, np.intp), np.array(fresh, bool)
+
+    def filter(self, keys, landmarks, timestamp):
+        """Smooth ``landmarks`` (n_hands, 21, 3) in place and return it."""
+        if not len(landmarks) or not self.enabled:
+            self._slots.clear()
+            return landmarks
+        rows, fresh = self._assign(list(keys)[:self.max_hands])
+        raw = landmarks[:len(rows)]
+
+        dt = timestamp - self._t[rows]
+        dt = np.where((dt > 0) & ~fresh, dt, DEFAULT_DT)[:, None, None]
+        x_prev, dx_prev = self._x[rows], self._dx[rows]
+
+        dx = (raw - x_prev) / dt
+        dx_hat = dx_prev + _alpha(self.d_cutoff, dt) * (dx - dx_prev)
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        x_hat = x_prev + _alpha(cutoff, dt) * (raw - x_prev)
+
+        # New hands start at their raw position with zero speed
+        x_hat[fresh] = raw[fresh]
+        dx_hat[fresh] = 0
+        self._x[rows] = x_hat
+        self._dx[rows] = dx_hat
+        self._t[rows] = timestamp
+        raw[...] = x_hat
+        return landmarks
+
+
+def add_smoothing_args(parser):
+    parser.add_argument("--no-smoothing", action="store_true",
+                        help="classify raw landmarks instead of One-Euro filtered ones")
+    return parser
@@ -0,0 +1,159 @@
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+# ===== Configuration =====
+SAMPLE_EVERY = 100       # Frames between samples
+WARMUP = 300             # Frames before the baseline (caches, buffers, JIT-ish warm paths)
+MAX_RSS_GROWTH_MB = 50.0
+MAX_TRACED_GROWTH_MB = 20.0
+MAX_LATENCY_DRIFT = 1.5  # Last/first median frame latency
+EDGE = 0.1               # Share of samples at each end compared for drift
+TOP_GROWTH = 10
+# =========================
+
+
+def rss_mb():
+    # Resident set size now (Linux), else the peak so far
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SoakMonitor:
+    """Watches a long pipeline run for memory growth and latency drift.
+
+    ``frame`` is called once per rendered frame, as it is shown.
+    Every ``every`` frames it samples RSS, memory traced by tracemalloc and
+    the median/p95 capture-to-render latency of those frames. After
+    ``warmup`` frames a tracemalloc snapshot becomes the baseline.
+    ``close`` compares the last samples with the first ones and the heap
+    with that snapshot (listing the lines that grew most), writes the JSON
+    report to ``path`` and sets ``passed``/``failures``.
+    """
+
+    def __init__(self, path, every=SAMPLE_EVERY, warmup=WARMUP,
+                 max_rss_growth_mb=MAX_RSS_GROWTH_MB, max_traced_growth_mb=MAX_TRACED_GROWTH_MB,
+                 max_latency_drift=MAX_LATENCY_DRIFT):
+        self.path = path
+        self.every = every
+        self.warmup = warmup
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.max_traced_growth_mb = max_traced_growth_mb
+        self.max_latency_drift = max_latency_drift
+        self.frames = 0
+        self.samples = []
+        self.passed = True
+        self.failures = []
+        self._latency = np.zeros(every)
+        self._baseline = None
+        self._started = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def frame(self, frame, now=None):
+        now = time.perf_counter() if now is None else now
+        self._latency[self.frames % self.every] = now - frame.arrived
+        self.frames += 1
+        if self.frames == self.warmup:
+            self._baseline = self._snapshot()
+        if self.frames % self.every == 0 and self.frames >= self.warmup:
+            p50, p95 = np.percentile(self._latency, (50, 95)) * 1e3
+            self.samples.append({"frame": self.frames,
+                                 "time": round(now - self._started, 2),
+                                 "rss_mb": round(rss_mb(), 2),
+                                 "traced_mb": round(tracemalloc.get_traced_memory()[0] / 2**20, 3),
+                                 "p50_ms": round(p50, 3), "p95_ms": round(p95, 3)})
+
+    def _snapshot(self):
+        # Leave out the monitor's own sample list
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+
+    def _judge(self):
+        # Medians over the first and last samples, so frames in flight don't read as growth
+        edge = max(1, int(len(self.samples) * EDGE))
+
+        def ends(key):
+            values = [s[key] for s in self.samples]
+            return float(np.median(values[:edge])), float(np.median(values[-edge:]))
+
+        (rss_start, rss_end), (traced_start, traced_end), (first_p50, last_p50) = (
+            ends("rss_mb"), ends("traced_mb"), ends("p50_ms"))
+        result = {
+            "rss_mb": {"start": round(rss_start, 2), "end": round(rss_end, 2),
+                       "peak": max(s["rss_mb"] for s in self.samples),
+                       "growth": round(rss_end - rss_start, 2)},
+            "traced_mb": {"start": round(traced_start, 3), "end": round(traced_end, 3),
+                          "growth": round(traced_end - traced_start, 3)},
+            "latency_ms": {"first_p50": round(first_p50, 3), "last_p50": round(last_p50, 3),
+                           "drift": round(last_p50 / first_p50, 3) if first_p50 else None},
+        }
+        if len(self.samples) > 1:
+            frames = [s["frame"] for s in self.samples]
+            slope = np.polyfit(frames, [s["rss_mb"] for s in self.samples], 1)[0]
+            result["rss_mb"]["per_10k_frames"] = round(float(slope) * 1e4, 3)
+
+        if result["rss_mb"]["growth"] > self.max_rss_growth_mb:
+            self.failures.append(f"RSS grew {result['rss_mb']['growth']} MB "
+                                 f"(limit {self.max_rss_growth_mb})")
+        if result["traced_mb"]["growth"] > self.max_traced_growth_mb:
+            self.failures.append(f"Python allocations grew {result['traced_mb']['growth']} MB "
+                                 f"(limit {self.max_traced_growth_mb})")
+        drift = result["latency_ms"]["drift"]
+        if drift is not None and drift > self.max_latency_drift:
+            self.failures.append(f"Median latency drifted x{drift} (limit x{self.max_latency_drift})")
+
+        if self._baseline is not None:
+            growth = sorted(self._snapshot().compare_to(self._baseline, "lineno"),
+                            key=lambda stat: stat.size_diff, reverse=True)[:TOP_GROWTH]
+            result["top_growth"] = [{"where": f"{stat.traceback[0].filename}:"
+                                              f"{stat.traceback[0].lineno}",
+                                     "size_kb": round(stat.size_diff / 1024, 1),
+                                     "count": stat.count_diff} for stat in growth]
+        return result
+
+    def close(self):
+        report = {"frames": self.frames, "duration_s": round(time.perf_counter() - self._started, 2),
+                  "sample_every": self.every, "warmup": self.warmup}
+        if self.samples:
+            report.update(self._judge())
+        else:
+            self.failures.append(f"Too few frames to sample ({self.frames}, warmup {self.warmup})")
+        self.passed = not self.failures
+        report["passed"] = self.passed
+        report["failures"] = self.failures
+        report["samples"] = self.samples
+        with open(self.path, "w") as f:
+            json.dump(report, f, indent=2)
+        tracemalloc.stop()
+        print(f"Soak {'passed' if self.passed else 'FAILED'} after {self.frames} frames: "
+              f"{'; '.join(self.failures) or 'no growth past the limits'} (report: {self.path})")
+
+
+def add_soak_args(parser):
+    parser.add_argument("--soak", default=None, metavar="REPORT",
+                        help="monitor memory and latency over the run, write a JSON report and "
+                             "exit non-zero past the limits (use with --max-frames and a "
+                             "synthetic or --replay source)")
+    parser.add_argument("--soak-max-rss-mb", type=float, default=MAX_RSS_GROWTH_MB,
+                        help="allowed RSS growth after warm-up")
+    parser.add_argument("--soak-max-traced-mb", type=float, default=MAX_TRACED_GROWTH_MB,
+                        help="allowed growth of Python allocations after warm-up")
+    parser.add_argument("--soak-max-drift", type=float, default=MAX_LATENCY_DRIFT,
+                        help="allowed ratio of final to initial median frame latency")
+    return parser
+
+
+def open_soak(args):
+    if not args.soak:
+        return None
+    return SoakMonitor(args.soak, max_rss_growth_mb=args.soak_max_rss_mb,
+                       max_traced_growth_mb=args.soak_max_traced_mb,
+                       max_latency_drift=args.soak_max_drift)
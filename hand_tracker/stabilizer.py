@@ -0,0 +1,77 @@
+from collections import deque
+
+from gestures import UNKNOWN
+
+
+class GestureStabilizer:
+    """Sliding-window majority vote with hysteresis, O(1) per frame.
+
+    Running (optionally confidence-weighted) counts are kept per label, so
+    an update only touches the label that entered the window and the one
+    that left it. The output switches only when the incoming label's count
+    beats the current output's, and it has done so for ``min_dwell``
+    consecutive frames.
+    """
+
+    def __init__(self, window=15, min_dwell=1, default=UNKNOWN):
+        self.window = window
+        self.min_dwell = min_dwell
+        self.history = deque()   # (label, weight), oldest first
+        self.counts = {}
+        self.stable = default
+        self._candidate = None
+        self._dwell = 0
+
+    def update(self, label, weight=1.0):
+        self.history.append((label, weight))
+        self.counts[label] = self.counts.get(label, 0.0) + weight
+        if len(self.history) > self.window:
+            old, old_weight = self.history.popleft()
+            remaining = self.counts.get(old, 0.0) - old_weight
+            if remaining > 1e-9:
+                self.counts[old] = remaining
+            else:
+                self.counts.pop(old, None)   # Zero-weight votes may outlive their count
+
+        # Only the incoming label's count went up, so it is the only challenger
+        if label != self.stable and self.counts.get(label, 0.0) > self.counts.get(self.stable, 0.0):
+            if label == self._candidate:
+                self._dwell += 1
+            else:
+                self._candidate, self._dwell = label, 1
+            if self._dwell >= self.min_dwell:
+                self.stable = label
+                self._candidate, self._dwell = None, 0
+        else:
+            self._candidate, self._dwell = None, 0
+        return self.stable
+
+    @property
+    def labels(self):
+        return [label for label, _ in self.history]
+
+
+class StabilizerBank:
+    """One GestureStabilizer per hand key (hand type, or track id)."""
+
+    def __init__(self, window=15, min_dwell=1, default=UNKNOWN):
+        self.window = window
+        self.min_dwell = min_dwell
+        self.default = default
+        self._stabilizers = {}
+
+    def __getitem__(self, key):
+        stabilizer = self._stabilizers.get(key)
+        if stabilizer is None:
+            stabilizer = GestureStabilizer(self.window, self.min_dwell, self.default)
+            self._stabilizers[key] = stabilizer
+        return stabilizer
+
+    def __contains__(self, key):
+        return key in self._stabilizers
+
+    def update(self, key, label, weight=1.0):
+        return self[key].update(label, weight)
+
+    def discard(self, key):
+        self._stabilizers.pop(key, None)
@@ -0,0 +1,44 @@
+import os
+import time
+
+
+def _launch_time():
+    # perf_counter() value at process start on Linux, else when this module was first imported
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rpartition(")")[2].split()[19])
+        since_start = (time.clock_gettime(time.CLOCK_BOOTTIME)
+                       - start_ticks / os.sysconf("SC_CLK_TCK"))
+        return time.perf_counter() - since_start
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter()
+
+
+LAUNCH = _launch_time()
+
+
+class StartupTimer:
+    """Seconds from launch to each startup milestone; each is recorded once.
+
+    Marking the ``report`` milestone (time to first gesture by default)
+    prints every milestone reached so far.
+    """
+
+    def __init__(self, report="first_gesture"):
+        self.report = report
+        self.marks = {}
+
+    def mark(self, name):
+        if name in self.marks:
+            return
+        self.marks[name] = time.perf_counter() - LAUNCH
+        if name == self.report:
+            print(self.summary())
+
+    def summary(self):
+        steps = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.marks.items())
+        return f"Startup: {steps}"
+
+
+# Shared by the pipeline and the entry points
+startup = StartupTimer()
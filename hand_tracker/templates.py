@@ -0,0 +1,201 @@
+import os
+import struct
+
+import numpy as np
+
+from gestures import UNKNOWN
+from landmarks import NUM_LANDMARKS, WRIST
+
+# ===== Configuration =====
+K = 5                  # Neighbours that vote on a label
+MAX_DISTANCE = 1.0     # Nearest template further than this (palm lengths) -> Unknown
+CLUSTER_SIZE = 64      # Templates per cluster on average; fewer than 4 clusters -> brute force
+PROBE = 3              # Nearest clusters searched per query
+KMEANS_ITERATIONS = 10
+MIDDLE_MCP = 9
+DIMS = NUM_LANDMARKS * 2
+# =========================
+
+# ===== Template file format =====
+# Header: magic, version, dims, template count, label count, label block size (little endian),
+# then the labels ('\n'-joined UTF-8), a uint16 label index per template and the float16 templates
+MAGIC = b"HTGTMPL\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIII")
+HEADER_SIZE = 32
+TEMPLATE_EXT = ".gtmpl"
+# ================================
+
+
+def normalize_landmarks(landmarks, is_right):
+    """(n, 21, 3) landmarks -> (n, 42) float32 pose vectors.
+
+    Each hand is moved to its wrist, rotated so the wrist -> middle knuckle
+    line points up, scaled so that line has length 1, and left hands are
+    mirrored onto right ones. Only x and y are kept.
+    """
+    points = landmarks[:, :, :2] - landmarks[:, WRIST, None, :2]
+    up = points[:, MIDDLE_MCP]
+    length = np.maximum(np.sqrt((up * up).sum(axis=-1)), 1e-6)
+    ux, uy = (up / length[:, None]).T
+    # Image y points down: the hand's right is (-uy, ux), its up is u
+    x = (points[..., 0] * -uy[:, None] + points[..., 1] * ux[:, None]) / length[:, None]
+    y = -(points[..., 0] * ux[:, None] + points[..., 1] * uy[:, None]) / length[:, None]
+    x = np.where(np.asarray(is_right)[:, None], x, -x)
+    return np.stack([x, y], axis=-1).reshape(len(points), DIMS).astype(np.float32)
+
+
+def _kmeans(data, n_clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    # Plain Lloyd's iterations from distinct random templates; returns centroids, assignment.
+    # Clusters left empty (identical templates pick the same centroid) are dropped
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+    norms = (data * data).sum(axis=1)
+    for _ in range(iterations):
+        distances = norms[:, None] - 2 * data @ centroids.T + (centroids * centroids).sum(axis=1)
+        assignment = distances.argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, data)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    filled = np.bincount(assignment, minlength=n_clusters) > 0
+    return centroids[filled], (np.cumsum(filled) - 1)[assignment]
+
+
+class TemplateClassifier:
+    """k-nearest-neighbour gesture classifier over recorded pose templates.
+
+    Templates are normalized pose vectors (see ``normalize_landmarks``).
+    ``build`` groups them with k-means and stores them in one contiguous
+    float32 matrix ordered by cluster, with ``offsets`` marking each
+    cluster's rows, so a query is compared with the centroids and then only
+    with the rows of its ``probe`` nearest clusters. Small sets are searched
+    in full. ``classify_batch`` has the same shape as
+    ``GestureTable.classify_batch`` but takes the landmarks themselves.
+    """
+
+    def __init__(self, k=K, max_distance=MAX_DISTANCE, probe=PROBE, default=UNKNOWN):
+        self.k = k
+        self.max_distance = max_distance
+        self.probe = probe
+        self.default = default
+        self.label_names = []
+        self._pending = []     # (label index, vectors) added since the last build
+        self.matrix = np.zeros((0, DIMS), np.float32)
+        self.labels = np.zeros(0, np.uint16)
+        self.build()
+
+    def __len__(self):
+        return len(self.matrix) + sum(len(vectors) for _, vectors in self._pending)
+
+    def add(self, label, landmarks, is_right):
+        """Add the hands in ``landmarks`` (n, 21, 3) as templates of ``label``.
+
+        They are matched against once ``build`` (or ``save``) runs.
+        """
+        if not len(landmarks):
+            return
+        if label not in self.label_names:
+            self.label_names.append(label)
+        self._pending.append((self.label_names.index(label),
+                              normalize_landmarks(landmarks, is_right)))
+
+    def build(self):
+        if self._pending:
+            self.matrix = np.concatenate([self.matrix] + [v for _, v in self._pending])
+            self.labels = np.concatenate([self.labels] + [np.full(len(v), i, np.uint16)
+                                                          for i, v in self._pending])
+            self._pending = []
+        n_clusters = len(self.matrix) // CLUSTER_SIZE
+        if n_clusters < 4:
+            self.centroids = self.matrix[:0]
+            self.offsets = np.array([0, len(self.matrix)])
+        else:
+            self.centroids, assignment = _kmeans(self.matrix, n_clusters)
+            order = np.argsort(assignment, kind="stable")
+            self.matrix = np.ascontiguousarray(self.matrix[order])
+            self.labels = self.labels[order]
+            self.offsets = np.searchsorted(assignment[order], np.arange(len(self.centroids) + 1))
+        self.norms = (self.matrix * self.matrix).sum(axis=1)
+
+    def _neighbours(self, query):
+        # Squared distances and rows of the templates in the nearest clusters
+        if len(self.centroids):
+            nearest = np.argpartition(((self.centroids - query) ** 2).sum(axis=1),
+                                      min(self.probe, len(self.centroids) - 1))[:self.probe]
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1])
+                                   for c in nearest])
+            if len(rows):
+                candidates = self.matrix[rows]
+                distances = self.norms[rows] - 2 * candidates @ query + query @ query
+                return distances, rows
+        # Small set, or no rows in the probed clusters: search everything
+        return self.norms - 2 * self.matrix @ query + query @ query, None
+
+    def classify_batch(self, landmarks, is_right):
+        """(n_hands, 21, 3) landmarks -> list of n_hands labels."""
+        if not len(landmarks) or not len(self.matrix):
+            return [self.default] * len(landmarks)
+        results = []
+        for query in normalize_landmarks(landmarks, is_right):
+            distances, rows = self._neighbours(query)
+            k = min(self.k, len(distances))
+            best = np.argpartition(distances, k - 1)[:k]
+            distances = np.sqrt(np.maximum(distances[best], 0))
+            if distances.min() > self.max_distance:
+                results.append(self.default)
+                continue
+            labels = self.labels[best if rows is None else rows[best]]
+            votes = np.bincount(labels, 1 / (distances + 1e-3), len(self.label_names))
+            results.append(self.label_names[int(votes.argmax())])
+        return results
+
+    def save(self, path):
+        if self._pending:
+            self.build()
+        names = "\n".join(self.label_names).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, DIMS, len(self.matrix), len(self.label_names),
+                                len(names)).ljust(HEADER_SIZE, b"\0"))
+            f.write(names)
+            self.labels.astype("<u2").tofile(f)
+            self.matrix.astype("<f2").tofile(f)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        classifier = cls(**kwargs)
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"Not a gesture template file: {path}")
+            _, version, dims, count, n_labels, names_size = HEADER.unpack_from(header)
+            if version != VERSION or dims != DIMS:
+                raise ValueError(f"Unsupported template file version {version} in {path}")
+            names = f.read(names_size).decode("utf-8")
+            classifier.label_names = names.split("\n") if n_labels else []
+            labels = np.fromfile(f, "<u2", count)
+            matrix = np.fromfile(f, "<f2", count * dims)
+        if len(matrix) != count * dims:
+            raise ValueError(f"Truncated template file: {path}")
+        classifier.matrix = matrix.reshape(count, dims).astype(np.float32)
+        classifier.labels = labels.astype(np.uint16)
+        classifier.build()
+        return classifier
+
+
+def open_templates(path):
+    # Templates from ``path``, or an empty set to learn into when it doesn't exist yet
+    if path and os.path.exists(path):
+        return TemplateClassifier.load(path)
+    return TemplateClassifier()
+
+
+def add_template_args(parser):
+    parser.add_argument("--templates", default=None, metavar="PATH",
+                        help=f"classify with recorded pose templates ({TEMPLATE_EXT}) "
+                             "instead of the finger rules")
+    parser.add_argument("--learn", default=None, metavar="LABEL",
+                        help="record templates of LABEL into --templates; 'r' starts/stops "
+                             "(always on when headless)")
+    return parser
@@ -0,0 +1,148 @@
+import numpy as np
+
+from landmarks import WRIST
+
+# ===== Configuration =====
+MIN_IOU = 0.2          # Bbox overlap needed to continue a track
+MAX_WRIST_JUMP = 0.75  # Otherwise, max wrist movement as a fraction of the track's bbox size
+MAX_MISSED = 5         # Frames a track survives without a detection
+TRAIL_LENGTH = 20
+# =========================
+
+
+def box_iou(a, b):
+    """IoU between every (x, y, w, h) box in ``a`` (n, 4) and ``b`` (m, 4)."""
+    ax0, ay0 = a[:, None, 0], a[:, None, 1]
+    ax1, ay1 = ax0 + a[:, None, 2], ay0 + a[:, None, 3]
+    bx0, by0 = b[None, :, 0], b[None, :, 1]
+    bx1, by1 = bx0 + b[None, :, 2], by0 + b[None, :, 3]
+    inter = (np.clip(np.minimum(ax1, bx1) - np.maximum(ax0, bx0), 0, None)
+             * np.clip(np.minimum(ay1, by1) - np.maximum(ay0, by0), 0, None))
+    union = a[:, None, 2] * a[:, None, 3] + b[None, :, 2] * b[None, :, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def _greedy(score, threshold, higher_is_better=True):
+    # Best pairs first; each row and column used once
+    pairs = []
+    order = np.argsort(-score if higher_is_better else score, axis=None)
+    rows, cols = set(), set()
+    for flat in order:
+        r, c = divmod(int(flat), score.shape[1])
+        value = score[r, c]
+        if (value < threshold) if higher_is_better else (value > threshold):
+            break
+        if r not in rows and c not in cols:
+            rows.add(r)
+            cols.add(c)
+            pairs.append((r, c))
+    return pairs
+
+
+class HandTracker:
+    """Gives every detected hand a stable id across frames.
+
+    Detections are matched to live tracks greedily by bbox IoU, then by
+    wrist distance for hands that moved too far to overlap. Unmatched
+    tracks coast for ``max_missed`` frames before they end. Track state
+    (bbox, wrist, wrist trail) lives in preallocated arrays of
+    ``max_tracks`` slots, doubled when more tracks are live, so every hand
+    gets its own id. ``ended`` lists the ids retired by the last ``update``
+    so per-id state elsewhere can be dropped.
+    """
+
+    def __init__(self, max_tracks=4, min_iou=MIN_IOU, max_wrist_jump=MAX_WRIST_JUMP,
+                 max_missed=MAX_MISSED, trail_length=TRAIL_LENGTH):
+        self.max_tracks = max_tracks
+        self.min_iou = min_iou
+        self.max_wrist_jump = max_wrist_jump
+        self.max_missed = max_missed
+        self.ids = np.full(max_tracks, -1)           # -1 marks a free slot
+        self.bboxes = np.zeros((max_tracks, 4), np.float32)
+        self.wrists = np.zeros((max_tracks, 2), np.float32)
+        self.missed = np.zeros(max_tracks, np.int32)
+        self.trails = np.zeros((max_tracks, trail_length, 2), np.int32)
+        self.trail_len = np.zeros(max_tracks, np.int32)
+        self.trail_pos = np.zeros(max_tracks, np.int32)
+        self.ended = []
+        self._next_id = 0
+        self._slots = {}   # id -> slot
+
+    def update(self, hands):
+        """Track ids for ``hands``, in the same order."""
+        self.ended = []
+        n = len(hands)
+        bboxes = np.array([hand["bbox"] for hand in hands], np.float32).reshape(n, 4)
+        wrists = np.array([hand["lmList"][WRIST][:2] for hand in hands], np.float32).reshape(n, 2)
+
+        live = np.flatnonzero(self.ids >= 0)
+        matches = []
+        if n and len(live):
+            matches = _greedy(box_iou(bboxes, self.bboxes[live]), self.min_iou)
+            left_dets = [d for d in range(n) if d not in {d for d, _ in matches}]
+            left_tracks = [t for t in range(len(live)) if t not in {t for _, t in matches}]
+            if left_dets and left_tracks:
+                jump = np.linalg.norm(wrists[left_dets, None] - self.wrists[live[left_tracks]][None],
+                                      axis=-1)
+                size = self.bboxes[live[left_tracks], 2:].max(axis=1)
+                for d, t in _greedy(jump / np.maximum(size, 1), self.max_wrist_jump, False):
+                    matches.append((left_dets[d], left_tracks[t]))
+
+        slots = np.full(n, -1)
+        for d, t in matches:
+            slots[d] = live[t]
+        self.missed[live] += 1
+        for d in np.flatnonzero(slots < 0):
+            slots[d] = self._start()
+        for d, slot in enumerate(slots):
+            self._observe(slot, bboxes[d], wrists[d])
+
+        ids = self.ids[slots]
+        for slot in np.flatnonzero((self.ids >= 0) & (self.missed > self.max_missed)):
+            self._end(slot)
+        return ids
+
+    def _grow(self):
+        # More live tracks than slots (e.g. hands coasting after a swap): double the arrays
+        # rather than leave a hand untracked
+        self.ids = np.concatenate([self.ids, np.full_like(self.ids, -1)])
+        for name in ("bboxes", "wrists", "missed", "trails", "trail_len", "trail_pos"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        self.max_tracks = len(self.ids)
+
+    def _start(self):
+        free = np.flatnonzero(self.ids < 0)
+        if not len(free):
+            self._grow()
+            free = np.flatnonzero(self.ids < 0)
+        slot = free[0]
+        self.ids[slot] = self._next_id
+        self._slots[self._next_id] = slot
+        self._next_id += 1
+        self.trail_len[slot] = 0
+        self.trail_pos[slot] = 0
+        return slot
+
+    def _observe(self, slot, bbox, wrist):
+        self.bboxes[slot] = bbox
+        self.wrists[slot] = wrist
+        self.missed[slot] = 0
+        length = self.trails.shape[1]
+        self.trails[slot, self.trail_pos[slot]] = wrist
+        self.trail_pos[slot] = (self.trail_pos[slot] + 1) % length
+        self.trail_len[slot] = min(self.trail_len[slot] + 1, length)
+
+    def _end(self, slot):
+        track_id = int(self.ids[slot])
+        self.ended.append(track_id)
+        del self._slots[track_id]
+        self.ids[slot] = -1
+
+    def trail(self, track_id):
+        """Wrist positions of a track, oldest first, as an (n, 2) int array."""
+        slot = self._slots.get(track_id)
+        if slot is None:
+            return self.trails[0, :0]
+        length, count = self.trails.shape[1], self.trail_len[slot]
+        return self.trails[slot, (self.trail_pos[slot] - count + np.arange(count)) % length]
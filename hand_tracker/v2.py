@@ -1,5 +1,12 @@
+from functools import partial
+
 import cv2
-from cvzone.HandTrackingModule import HandDetector
+from detection import hand_detector, print_detector_stats
+from landmarks import LandmarkBuffer, count_fingers
+from pipeline import Pipeline, build_arg_parser, open_input, pipeline_options
+from session import open_session
+from smoothing import LandmarkFilterBank
+from startup import startup
 
 # ===== Configuration =====
 CAM_WIDTH = 1280       # Reduced resolution for better performance
@@ -9,85 +16,64 @@ MIN_TRACKING_CONFIDENCE = 0.5
 MAX_HANDS = 2          # Maximum number of hands to detect
 # =========================
 
-def count_fingers(lmList, hand_type):
-    fingers = []
-    
-    # Thumb detection (different logic for left/right hand)
-    if hand_type == "Right":
-        thumb_open = lmList[4][0] > lmList[3][0]  # Right hand thumb
-    else:
-        thumb_open = lmList[4][0] < lmList[3][0]  # Left hand thumb
-    fingers.append(1 if thumb_open else 0)
-    
-    # Other fingers (index to pinky)
-    tip_ids = [8, 12, 16, 20]  # Finger tip landmarks
-    for tip in tip_ids:
-        fingers.append(1 if lmList[tip][1] < lmList[tip-2][1] else 0)
-    
-    return sum(fingers)
+def main(argv=None):
+    args = build_arg_parser("Hand Tracking").parse_args(argv)
 
-def main():
-    # Initialize webcam
-    cap = cv2.VideoCapture(0)
-    cap.set(3, CAM_WIDTH)
-    cap.set(4, CAM_HEIGHT)
-    
-    # Initialize detector
-    detector = HandDetector(
+    # Initialize frame source (webcam by default) and detector
+    source, detector = open_input(args, CAM_WIDTH, CAM_HEIGHT, partial(
+        hand_detector,
         maxHands=MAX_HANDS,
         detectionCon=MIN_DETECTION_CONFIDENCE,
         minTrackCon=MIN_TRACKING_CONFIDENCE
-    )
+    ))
     
-    while True:
-        # Read frame
-        success, img = cap.read()
-        if not success:
-            print("Failed to capture frame")
-            break
-        
+    landmarks = LandmarkBuffer(max_hands=MAX_HANDS)
+    smoothing = LandmarkFilterBank(max_hands=MAX_HANDS, enabled=not args.no_smoothing)
+    recorder = open_session(args)  # Saves what is shown, off the render thread
+    
+    def process(img):
         # Detect hands
-        hands, img = detector.findHands(img, flipType=True)
+        return detector.findHands(img, flipType=True)
+
+    def render(frame, result):
+        hands, img = result
         
-        if hands:
-            for hand in hands:
-                lmList = hand["lmList"]
-                bbox = hand["bbox"]
-                hand_type = hand["type"]
-                
-                # Skip invalid hand data
-                if not lmList or len(lmList) < 21:
-                    continue
-                
-                # Count fingers
-                finger_count = count_fingers(lmList, hand_type)
-                
-                # Draw hand-specific information
-                color = (0, 255, 0) if hand_type == "Right" else (0, 0, 255)
-                cv2.rectangle(img, (bbox[0]-20, bbox[1]-20),
-                            (bbox[0]+bbox[2]+20, bbox[1]+bbox[3]+20),
-                            color, 2)
-                
-                # Display finger count near hand
-                text_pos = (bbox[0]-50, bbox[1]-50 if bbox[1]-50 > 50 else bbox[1]+50)
-                cv2.putText(img, f"{hand_type}: {finger_count}", 
-                        text_pos, cv2.FONT_HERSHEY_PLAIN, 3, color, 3)
+        # Count fingers for all hands at once
+        with pipeline.profiler.measure(frame.index, "classify"):
+            lms, is_right = landmarks.load(hands)
+            smoothing.filter([hand["type"] for hand in landmarks.hands], lms, frame.timestamp)
+            finger_counts = count_fingers(lms, is_right)
+            if len(finger_counts):
+                startup.mark("first_gesture")
+        for hand, finger_count in zip(landmarks.hands, finger_counts):
+            bbox = hand["bbox"]
+            hand_type = hand["type"]
+            
+            # Draw hand-specific information
+            color = (0, 255, 0) if hand_type == "Right" else (0, 0, 255)
+            cv2.rectangle(img, (bbox[0]-20, bbox[1]-20),
+                        (bbox[0]+bbox[2]+20, bbox[1]+bbox[3]+20),
+                        color, 2)
+            
+            # Display finger count near hand
+            text_pos = (bbox[0]-50, bbox[1]-50 if bbox[1]-50 > 50 else bbox[1]+50)
+            cv2.putText(img, f"{hand_type}: {finger_count}", 
+                    text_pos, cv2.FONT_HERSHEY_PLAIN, 3, color, 3)
         
-        # Add FPS counter
-        fps = cap.get(cv2.CAP_PROP_FPS)
+        # Add FPS counter (measured, not the camera's nominal rate)
+        fps = pipeline.fps
         cv2.putText(img, f"FPS: {int(fps)}", (50, 50), 
                 cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
-        
-        # Display image
-        cv2.imshow("Hand Tracking", img)
-        
-        # Exit on 'q' press
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+        recorder.write(frame, img, [f"{hand['type']}: {count}"
+                                    for hand, count in zip(landmarks.hands, finger_counts)])
+        return img
     
-    # Cleanup
-    cap.release()
-    cv2.destroyAllWindows()
+    # Run until 'q' is pressed
+    pipeline = Pipeline(source, process, render, window="Hand Tracking",
+                        **pipeline_options(args))
+    pipeline.run()
+    print_detector_stats(detector)
+    recorder.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The apps import their sibling modules directly, as when run from hand_tracker/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "hand_tracker"))
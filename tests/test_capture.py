@@ -0,0 +1,80 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from pipeline import DRAIN_MAX, CameraSource
+
+
+class FakeCapture:
+    """A camera whose driver queue is always full: grab() returns at once."""
+
+    def __init__(self, grab_delay=0.0, fps=30.0):
+        self.grab_delay = grab_delay
+        self.props = {cv2.CAP_PROP_FPS: fps}
+        self.grabs = []   # perf_counter time each grab returned
+        self.frame = 0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            return False   # Not honoured, so the source drains
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0.0)
+
+    def grab(self):
+        if self.grab_delay:
+            time.sleep(self.grab_delay)
+        self.frame += 1
+        self.grabs.append(time.perf_counter())
+        return True
+
+    def retrieve(self):
+        return True, np.full((4, 4, 3), self.frame, np.uint8)
+
+    def release(self):
+        pass
+
+
+def test_queued_frames_are_drained_and_stamped_at_the_last_grab():
+    cap = FakeCapture()
+    source = CameraSource(cap=cap, fps=30)
+    assert source.buffered
+    for reads in range(1, 4):
+        success, img = source.read()
+        assert success
+        assert source.drained == DRAIN_MAX * reads
+        assert img[0, 0, 0] == cap.frame   # The newest frame, not the first one grabbed
+        assert cap.grabs[-1] <= source.timestamp < cap.grabs[-1] + 1e-3
+
+
+def test_frames_that_take_a_period_to_arrive_are_kept():
+    cap = FakeCapture(grab_delay=0.025)
+    source = CameraSource(cap=cap, fps=30)
+    before = time.perf_counter()
+    success, _ = source.read()
+    assert success
+    assert source.drained == 0
+    assert len(cap.grabs) == 1
+    assert before < cap.grabs[0] <= source.timestamp < cap.grabs[0] + 1e-3
+
+
+def test_file_backed_capture_drains(tmp_path):
+    path = str(tmp_path / "frames.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(20):
+        writer.write(np.full((48, 64, 3), i * 10, np.uint8))
+    writer.release()
+
+    source = CameraSource(cap=cv2.VideoCapture(path), fps=30)
+    if not source.buffered:
+        pytest.skip("this OpenCV build honours a one-frame buffer for files")
+    start = time.perf_counter()
+    success, img = source.read()
+    assert success
+    assert source.drained == DRAIN_MAX
+    assert start < source.timestamp < time.perf_counter()
+    assert abs(int(img.mean()) - DRAIN_MAX * 10) <= 2   # Frame DRAIN_MAX, not frame 0
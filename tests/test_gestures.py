@@ -0,0 +1,30 @@
+import warnings
+
+import pytest
+
+from gestures import DEFAULT_RULES, GestureTable
+
+
+def test_registering_a_free_pattern_is_quiet():
+    table = GestureTable()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        table.register('Point ☝️', '01000')
+    assert table.classify([0, 1, 0, 0, 0]) == 'Point ☝️'
+
+
+def test_registering_an_overlap_warns():
+    table = GestureTable()
+    with pytest.warns(UserWarning) as caught:
+        table.register('Spidey 🕷️', '11001')
+    messages = [str(w.message) for w in caught]
+    assert any("overlaps I Love You" in m for m in messages)
+    assert any("'I Love You 🤟' (11001) can never fire" in m for m in messages)
+    assert table.classify([1, 1, 0, 0, 1]) == 'Spidey 🕷️'
+
+
+def test_default_rules_all_fire():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        table = GestureTable(DEFAULT_RULES)
+    assert set(table.table) >= {name for name, _ in DEFAULT_RULES}
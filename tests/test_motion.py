@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pytest
+
+from motion import WINDOW, MotionBuffer
+
+SCALE = 50.0   # Palm length in pixels
+
+
+def push(buffer, x, y, t, pinched=False):
+    buffer.push(x, y, x, y, t, SCALE, pinched)
+
+
+def circle(buffer, start=0.0):
+    # Up to two turns of radius 2 palm lengths; returns the motion recognized
+    for i in range(20):
+        angle = 2 * math.pi * i / 10
+        push(buffer, 300 + 100 * math.cos(angle), 300 + 100 * math.sin(angle), start + i / 30)
+        label = buffer.recognize()
+        if label:
+            return label
+    return None
+
+
+def test_circle_then_still_hand_leaves_no_residue():
+    buffer = MotionBuffer()
+    assert circle(buffer) == "Circle CW"
+    for i in range(WINDOW + 10):
+        push(buffer, 300.0, 300.0, 2 + i / 30)
+        assert buffer.recognize() is None
+    assert buffer.path == pytest.approx(0.0)
+    assert buffer.turning == pytest.approx(0.0)
+    assert buffer.reversals == 0
+    assert buffer.pinch_count == 0
+    assert np.allclose(buffer.histogram, 0.0)
+
+
+def test_cleared_buffer_matches_a_fresh_one():
+    buffer = MotionBuffer()
+    assert circle(buffer) is not None
+    fresh = MotionBuffer()
+    rng = np.random.default_rng(0)
+    for i in range(2 * WINDOW):
+        x, y = (300 + rng.normal(0, 8, 2)).tolist()   # Jitter above the direction threshold
+        for b in (buffer, fresh):
+            push(b, x, y, 2 + i / 30, pinched=i % 3 == 0)
+    ours, theirs = buffer.features(), fresh.features()
+    assert (buffer.histogram >= -1e-9).all()
+    for key in ("path", "turning", "reversals", "pinch"):
+        assert ours[key] == pytest.approx(theirs[key])
+    assert np.allclose(ours["histogram"], theirs["histogram"])
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from recording import RECORD_DTYPE, LandmarkRecording, LandmarkWriter
+
+
+def hand(x, side="Right"):
+    return {"lmList": [[x, i, 0] for i in range(21)], "bbox": (x, 0, 10, 10), "type": side}
+
+
+def record(path, frames):
+    writer = LandmarkWriter(path, 640, 480)
+    for i, hands in enumerate(frames):
+        writer.write(i / 30, hands)
+    writer.close()
+
+
+def test_negative_indexes_count_from_the_last_frame(tmp_path):
+    path = tmp_path / "hands.lmrec"
+    record(path, [[hand(1)], [], [hand(3), hand(4, "Left")]])
+    recording = LandmarkRecording(path)
+    assert len(recording) == 3
+    assert [h["bbox"][0] for h in recording.hands(-1)] == [3, 4]
+    assert recording.hands(-2) == []
+    assert recording.hands(-3)[0]["bbox"][0] == 1
+    for index in (3, -4):
+        with pytest.raises(IndexError):
+            recording[index]
+
+
+def test_a_torn_last_record_is_dropped_with_a_warning(tmp_path):
+    path = tmp_path / "hands.lmrec"
+    record(path, [[hand(1)], [hand(2)], [hand(3)]])
+    os.truncate(path, os.path.getsize(path) - RECORD_DTYPE.itemsize // 2)
+    with pytest.warns(UserWarning, match="partial record"):
+        recording = LandmarkRecording(path)
+    assert len(recording) == 2
+    assert recording.hands(-1)[0]["bbox"][0] == 2
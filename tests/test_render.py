@@ -0,0 +1,18 @@
+import cv2
+import numpy as np
+
+from render import Compositor
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def test_sprite_cache_keeps_the_most_recent_labels():
+    compositor = Compositor(sprite_cache=8)
+    img = np.zeros((120, 320, 3), np.uint8)
+    compositor.label(img, "Paper", (10, 60), FONT, 1, (0, 255, 0), 2)
+    for i in range(100):
+        compositor.label(img, f"REC {i}", (10, 60), FONT, 1, (0, 0, 255), 2)
+        compositor.label(img, "Paper", (10, 60), FONT, 1, (0, 255, 0), 2)
+    assert len(compositor._sprites) == 8
+    texts = [key[0] for key in compositor._sprites]
+    assert "Paper" in texts and "REC 99" in texts and "REC 0" not in texts
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from gestures import RPS_RULES
+from landmarks import FINGER_PIPS, FINGER_TIPS, NUM_LANDMARKS, THUMB_IP, THUMB_TIP, WRIST
+from recording import LandmarkRecording, LandmarkWriter
+from rps_game import ROCK, PAPER, SCISSORS, RoundEngine, players_by_position, replay_rounds
+
+WIDTH, HEIGHT = 1280, 720
+PATTERNS = dict(RPS_RULES)
+# Poses of the left and right player per 5.25 s round (countdown 3 s, window 0.25 s, result 2 s)
+SCRIPT = [(ROCK, SCISSORS), (PAPER, PAPER), (SCISSORS, ROCK), (None, PAPER)]
+ROUND_SECONDS = 5.25
+
+
+def hand(x, pose):
+    # A right hand at x whose finger states spell out ``pose``
+    lm = np.zeros((NUM_LANDMARKS, 3), np.float32)
+    lm[:, 0], lm[:, 1] = x, 300
+    lm[WRIST, 1] = 420
+    pattern = PATTERNS[pose]
+    lm[THUMB_IP, 0] = x
+    lm[THUMB_TIP, 0] = x + 20 if pattern[0] == "1" else x - 20
+    for up, tip, pip in zip(pattern[1:], FINGER_TIPS, FINGER_PIPS):
+        lm[pip, 1] = 300
+        lm[tip, 1] = 240 if up == "1" else 330
+    return {"lmList": lm.tolist(), "bbox": (x - 60, 220, 120, 220), "type": "Right"}
+
+
+def record(path, fps):
+    writer = LandmarkWriter(str(path), WIDTH, HEIGHT)
+    for i in range(int(len(SCRIPT) * ROUND_SECONDS * fps)):
+        t = i / fps
+        left, right = SCRIPT[int(t // ROUND_SECONDS)]
+        writer.write(t, [hand(x, pose) for x, pose in ((320, left), (960, right)) if pose])
+    writer.close()
+    return LandmarkRecording(str(path))
+
+
+def outcomes(results):
+    return [(r["moves"], r["winner"]) for r in results]
+
+
+@pytest.mark.parametrize("fps", [24, 30, 60])
+def test_duel_rounds_from_a_recording(tmp_path, fps):
+    results = replay_rounds(record(tmp_path / "duel.lmrec", fps), RoundEngine("duel"))
+    assert outcomes(results) == [([ROCK, SCISSORS], "Player 1"),
+                                 ([PAPER, PAPER], None),
+                                 ([SCISSORS, ROCK], "Player 2"),
+                                 ([None, PAPER], "Player 2")]
+    assert results[-1]["scores"] == [1, 2]
+
+
+def test_replays_are_identical(tmp_path):
+    recording = record(tmp_path / "duel.lmrec", 30)
+    first = replay_rounds(recording, RoundEngine("cpu", seed=7))
+    assert first == replay_rounds(recording, RoundEngine("cpu", seed=7))
+    # Against the CPU the leftmost hand plays, wherever it is
+    assert [r["moves"][0] for r in first] == [ROCK, PAPER, SCISSORS, PAPER]
+
+
+def test_lone_hand_plays_for_its_side():
+    lms = np.zeros((1, NUM_LANDMARKS, 3), np.float32)
+    lms[0, WRIST, 0] = 900
+    assert players_by_position(lms, [ROCK], WIDTH) == [None, ROCK]
+    lms[0, WRIST, 0] = 300
+    assert players_by_position(lms, [ROCK], WIDTH) == [ROCK]
+    assert players_by_position(lms, [ROCK], WIDTH, players=1) == [ROCK]
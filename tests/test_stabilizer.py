@@ -0,0 +1,45 @@
+from stabilizer import GestureStabilizer, StabilizerBank
+
+
+def test_zero_weight_votes_retire_cleanly():
+    stabilizer = GestureStabilizer(window=2)
+    stabilizer.update('A', 0.0)
+    stabilizer.update('A', 0.0)
+    assert stabilizer.update('B', 1.0) == 'B'
+    assert stabilizer.update('B', 1.0) == 'B'
+    assert stabilizer.counts == {'B': 2.0}
+
+
+def test_switches_only_when_the_challenger_outvotes_the_output():
+    stabilizer = GestureStabilizer(window=5)
+    for _ in range(5):
+        stabilizer.update('A')
+    assert [stabilizer.update('B') for _ in range(3)] == ['A', 'A', 'B']
+    # A single stray frame doesn't switch back
+    assert stabilizer.update('A') == 'B'
+
+
+def test_low_confidence_votes_count_less():
+    stabilizer = GestureStabilizer(window=4)
+    stabilizer.update('A', 0.9)
+    assert [stabilizer.update('B', 0.3) for _ in range(3)] == ['A', 'A', 'A']
+    assert stabilizer.update('B', 0.3) == 'B'   # A's vote has left the window
+
+
+def test_min_dwell_waits_for_consecutive_wins():
+    stabilizer = GestureStabilizer(window=3, min_dwell=2)
+    stabilizer.update('A')
+    stabilizer.update('A')
+    assert stabilizer.update('B') == 'A'
+    assert stabilizer.update('B') == 'A'   # Ahead for the first frame
+    assert stabilizer.update('B') == 'B'   # And the second
+    assert stabilizer.update('C') == 'B'
+    assert stabilizer.update('A') == 'B'   # Interrupted challengers start over
+
+
+def test_bank_keeps_hands_apart():
+    bank = StabilizerBank(window=3)
+    assert bank.update(0, 'A') == 'A'
+    assert bank.update(1, 'B') == 'B'
+    bank.discard(0)
+    assert 0 not in bank and 1 in bank
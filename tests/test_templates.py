@@ -0,0 +1,26 @@
+import numpy as np
+
+from templates import CLUSTER_SIZE, TemplateClassifier
+
+
+def pose(spread):
+    # A hand whose fingertips fan out by ``spread``; wrist at the origin, middle knuckle up
+    landmarks = np.zeros((21, 3), np.float32)
+    landmarks[1:, 0] = np.linspace(-spread, spread, 20)
+    landmarks[1:, 1] = -np.linspace(50, 150, 20)
+    landmarks[9] = (0, -100, 0)
+    return landmarks
+
+
+def test_duplicate_poses_build_clusters_that_all_hold_templates():
+    classifier = TemplateClassifier()
+    count = CLUSTER_SIZE * 8
+    classifier.add("Open", np.repeat(pose(80)[None], count, axis=0), np.ones(count, bool))
+    classifier.add("Closed", np.repeat(pose(10)[None], count, axis=0), np.ones(count, bool))
+    classifier.build()
+    assert 0 < len(classifier.centroids) <= 2
+    assert (np.diff(classifier.offsets) > 0).all()
+    assert classifier.offsets[-1] == len(classifier.matrix) == 2 * count
+
+    queries = np.stack([pose(80), pose(10), pose(75)])
+    assert classifier.classify_batch(queries, np.ones(3, bool)) == ["Open", "Closed", "Open"]
@@ -0,0 +1,23 @@
+from tracking import HandTracker
+
+
+def hand(x, y):
+    return {"bbox": (x, y, 100, 100), "lmList": [[x + 50, y + 100, 0]] * 21}
+
+
+def test_new_hands_while_old_tracks_coast_get_new_slots_and_ids():
+    tracker = HandTracker(max_tracks=2)
+    originals = [hand(0, 0), hand(200, 0)]
+    assert tracker.update(originals).tolist() == [0, 1]
+
+    # Two other hands far away while the originals coast: the slots double
+    assert tracker.update([hand(800, 500), hand(1000, 500)]).tolist() == [2, 3]
+    assert tracker.max_tracks == 4
+    assert tracker.ended == []
+
+    # The originals come back within max_missed and keep their ids and trails
+    assert tracker.update(originals).tolist() == [0, 1]
+    assert tracker.trail(0).tolist() == [[50, 100], [50, 100]]
+    assert tracker.trail(2).tolist() == [[850, 600]]
+    assert sorted(tracker._slots) == [0, 1, 2, 3]
+    assert len(set(tracker._slots.values())) == 4